@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+This file is part of opensesame.
+
+opensesame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+opensesame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with opensesame.  If not, see <http://www.gnu.org/licenses/>.
+
+Counts the pygame events that are created while mouse events are routed
+through a nested widget tree, and the time that routing takes. Run it on
+two revisions of the GUI to compare them:
+
+	python allocations.py [--depth 6] [--events 10000]
+
+The scripted events are created before counting starts, so every counted
+event is created by the GUI itself.
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+from timeit import default_timer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import benchmark
+import pygame
+
+def build(gui, depth, n=10):
+
+	"""Returns a table with an n x n grid of radio buttons, nested in depth
+	tables"""
+
+	group = gui.Group()
+	grid = gui.Table()
+	for row in range(n):
+		grid.tr()
+		for col in range(n):
+			grid.td(gui.Radio(group, value=(row, col)), width=32, height=32)
+	w = grid
+	for i in range(depth):
+		t = gui.Table()
+		t.tr()
+		t.td(w)
+		w = t
+	return w
+
+def main():
+
+	args = sys.argv[1:]
+	depth = 6
+	n_events = 10000
+	if "--depth" in args:
+		depth = int(args[args.index("--depth")+1])
+	if "--events" in args:
+		n_events = int(args[args.index("--events")+1])
+
+	pygame.init()
+	pygame.display.set_mode(benchmark.resolution)
+	benchmark.install_stubs()
+	from pgu import gui
+
+	app = gui.Desktop()
+	app.init(build(gui, depth))
+	radios = benchmark.find(app.widget, gui.Radio)
+	positions = [r.get_abs_rect().center for r in radios]
+
+	# A mix of motion over the grid and clicks
+	events = []
+	for i in range(n_events):
+		pos = positions[i % len(positions)]
+		if i % 10 == 9:
+			events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos,
+				button=1))
+		elif i % 10 == 0 and i > 0:
+			events.append(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=pos,
+				button=1))
+		else:
+			events.append(pygame.event.Event(pygame.MOUSEMOTION, pos=pos,
+				rel=(0, 0), buttons=(0, 0, 0)))
+
+	count = [0]
+	Event = pygame.event.Event
+	def counting_event(*args, **kwdict):
+		count[0] += 1
+		return Event(*args, **kwdict)
+	pygame.event.Event = counting_event
+
+	t0 = default_timer()
+	for e in events:
+		app.event(e)
+	duration = default_timer()-t0
+	pygame.event.Event = Event
+
+	print("depth: %d, events: %d" % (depth, len(events)))
+	print("pygame events created per event: %.2f" % (1.*count[0]/len(events)))
+	print("routing time per event: %.1f us" % (1e6*duration/len(events)))
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,565 @@
+#!/usr/bin/env python
+"""
+This file is part of opensesame.
+
+opensesame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+opensesame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with opensesame.  If not, see <http://www.gnu.org/licenses/>.
+
+Headless benchmark for the questionnaire plug-ins.
+
+Every plug-in is run against the SDL dummy video driver, with stand-ins for
+the parts of libopensesame, libqtopensesame, openexp and PyQt4 that the
+plug-ins use, and with a scripted stream of pygame events (clicks, typing
+and mouse sweeps) instead of a participant. For each plug-in and parameter
+set this reports:
+
+	build -- the duration of prepare() (ms)
+	fps -- the number of frames drawn per second while running
+	latency -- the mean and maximum time from injecting an event until the
+		first callback that it triggers (ms)
+	peak memory -- the peak resident set size of the process (kB)
+
+Every case runs in its own process, so that the peak memory is not polluted
+by the other cases. A single case can be run on its own, by its name (such
+as multiple_choice/choices=10) or by its index in the list of cases. Its
+results are then printed as JSON.
+
+Usage:
+	python benchmark.py [--json results.json] [--case name|index]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import json
+import types
+import subprocess
+from timeit import default_timer
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import pygame
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(root, "multiple_choice"))
+
+# The size of the dummy display
+resolution = 1024, 768
+# The maximum frame rate for event-driven apps. This is set much higher than
+# a real display refresh rate, so that the throughput is measured.
+refresh_rate = 10000
+
+def clock():
+
+	"""Returns the current time in milliseconds"""
+
+	return 1000.*default_timer()
+
+class script_exhausted(Exception):
+
+	"""Raised when a plug-in is still running after its script has ended"""
+
+	pass
+
+# Stand-ins for the OpenSesame modules that the plug-ins import
+
+class stub_runtime_error(Exception):
+
+	pass
+
+class stub_experiment(object):
+
+	"""A stand-in for libopensesame.experiment"""
+
+	def __init__(self):
+
+		self.resources = {}
+		self.vars = {"width" : resolution[0], "height" : resolution[1],
+			"mouse_backend" : "legacy", "canvas_backend" : "legacy"}
+		self.surface = pygame.display.get_surface()
+
+	def resource(self, name):
+
+		return self.resources[name]
+
+	def set(self, var, val):
+
+		self.vars[var] = val
+
+	def get(self, var):
+
+		# OpenSesame returns None values as the string 'None'
+		val = self.vars[var]
+		if val == None:
+			return "None"
+		return val
+
+	def has(self, var):
+
+		return var in self.vars
+
+	def usanitize(self, s):
+
+		return s
+
+	def unsanitize(self, s):
+
+		return s
+
+class stub_item(object):
+
+	"""A stand-in for libopensesame.item.item"""
+
+	def __init__(self, name, experiment, string=None):
+
+		self.name = name
+		self.experiment = experiment
+
+	def prepare(self):
+
+		pass
+
+	def get(self, var):
+
+		if var in self.__dict__:
+			return self.__dict__[var]
+		return self.experiment.get(var)
+
+	def has(self, var):
+
+		return var in self.__dict__ or self.experiment.has(var)
+
+	def time(self):
+
+		return clock()
+
+	def set_item_onset(self):
+
+		self.experiment.set("time_%s" % self.name, self.time())
+
+class stub_canvas(object):
+
+	"""A stand-in for the legacy openexp.canvas.canvas"""
+
+	# The number of times that a canvas has been shown
+	shown = 0
+
+	def __init__(self, experiment):
+
+		self.experiment = experiment
+		self.surface = experiment.surface.copy()
+		self.bgcolor = pygame.Color("black")
+		self.fgcolor = pygame.Color("white")
+		self.font = pygame.font.Font(None, 18)
+
+	def set_bgcolor(self, color):
+
+		self.bgcolor = pygame.Color(color)
+
+	def set_fgcolor(self, color):
+
+		self.fgcolor = pygame.Color(color)
+
+	def clear(self):
+
+		self.surface.fill(self.bgcolor)
+
+	def text(self, text, y, color=None):
+
+		if color == None:
+			color = self.fgcolor
+		surf = self.font.render(text, True, pygame.Color(color))
+		self.surface.blit(surf, ((resolution[0]-surf.get_width())//2, y))
+
+	def rect(self, x, y, w, h, fill=False, color=None):
+
+		if color == None:
+			color = self.fgcolor
+		pygame.draw.rect(self.surface, pygame.Color(color), (x, y, w, h),
+			0 if fill else 1)
+
+	def show(self):
+
+		self.experiment.surface.blit(self.surface, (0, 0))
+		pygame.display.flip()
+		stub_canvas.shown += 1
+		return clock()
+
+class stub_mouse(object):
+
+	"""A stand-in for openexp.mouse.mouse, which follows a list of scripted
+	positions and clicks when the list is exhausted"""
+
+	# The positions that the mouse will go through
+	script = []
+
+	def __init__(self, experiment, timeout=None):
+
+		self.script = list(stub_mouse.script)
+		self.pos = self.script[0]
+
+	def get_pos(self):
+
+		return self.pos, clock()
+
+	def get_click(self, timeout=None):
+
+		if not self.script:
+			return 1, self.pos, clock()
+		self.pos = self.script.pop(0)
+		return None, None, clock()
+
+def install_stubs():
+
+	"""Registers the stand-in modules in sys.modules"""
+
+	def module(name, **attrs):
+		m = types.ModuleType(name)
+		m.__dict__.update(attrs)
+		sys.modules[name] = m
+		return m
+
+	class qtplugin(object):
+		pass
+
+	libopensesame = module("libopensesame")
+	libopensesame.item = module("libopensesame.item", item=stub_item)
+	libopensesame.exceptions = module("libopensesame.exceptions",
+		runtime_error=stub_runtime_error)
+	libqtopensesame = module("libqtopensesame")
+	libqtopensesame.qtplugin = module("libqtopensesame.qtplugin",
+		qtplugin=qtplugin)
+	openexp = module("openexp")
+	openexp.canvas = module("openexp.canvas", canvas=stub_canvas)
+	openexp.mouse = module("openexp.mouse", mouse=stub_mouse)
+	PyQt4 = module("PyQt4")
+	PyQt4.QtGui = module("PyQt4.QtGui")
+	PyQt4.QtCore = module("PyQt4.QtCore", QString=lambda s: s)
+
+	# The plug-ins are written for Python 2
+	if sys.version_info[0] >= 3:
+		import builtins
+		builtins.unicode = str
+
+def load_plugin(plugin):
+
+	"""Imports a plug-in module from its source file"""
+
+	path = os.path.join(root, plugin, "%s.py" % plugin)
+	try:
+		import importlib.util
+	except ImportError:
+		import imp
+		return imp.load_source(plugin, path)
+	spec = importlib.util.spec_from_file_location(plugin, path)
+	module = importlib.util.module_from_spec(spec)
+	sys.modules[plugin] = module
+	spec.loader.exec_module(module)
+	return module
+
+# Scripted event streams
+
+def motion(pos):
+
+	return [pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0),
+		buttons=(0, 0, 0))]
+
+def click(widget):
+
+	"""Returns the events for moving onto a widget and clicking it"""
+
+	pos = widget.get_abs_rect().center
+	return [motion(pos),
+		[pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)],
+		[pygame.event.Event(pygame.MOUSEBUTTONUP, pos=pos, button=1)]]
+
+def typing(text):
+
+	"""Returns the events for typing some text"""
+
+	batches = []
+	for c in text:
+		key = ord(c) if c != "\n" else pygame.K_RETURN
+		batches.append([pygame.event.Event(pygame.KEYDOWN, key=key, mod=0,
+			unicode=c)])
+		batches.append([pygame.event.Event(pygame.KEYUP, key=key, mod=0)])
+	return batches
+
+def sweep(n=100):
+
+	"""Returns the events for sweeping the mouse across the screen"""
+
+	w, h = resolution
+	return [motion((i*(w-1)//n, i*(h-1)//n)) for i in range(n)]
+
+def find(widget, cls):
+
+	"""Returns all widgets of a given class in a widget tree"""
+
+	found = []
+	if isinstance(widget, cls):
+		found.append(widget)
+	for w in getattr(widget, "widgets", []):
+		found += find(w, cls)
+	return found
+
+def visible(widget):
+
+	"""Returns True if the center of a widget is not scrolled out of view"""
+
+	pos = widget.get_abs_rect().center
+	w = widget.container
+	while w != None:
+		if not w.get_abs_rect().collidepoint(pos):
+			return False
+		w = w.container
+	return True
+
+class event_feed(object):
+
+	"""Replaces App.pump, so that the app receives the scripted events one
+	batch at a time, and records the time from injecting each batch to the
+	first callback that it triggers."""
+
+	def __init__(self, app, batches):
+
+		self.app = app
+		self.batches = list(batches)
+		self.injected = None
+		self.latencies = []
+		self.pump = app.pump
+		app.pump = self
+		# Make sure that an event-driven App.run doesn't block
+		pygame.event.post(pygame.event.Event(self.wakeup))
+
+	@property
+	def wakeup(self):
+
+		from pgu import gui
+		return gui.WAKEUP
+
+	def __call__(self):
+
+		# Drain the real queue
+		self.pump()
+		if not self.batches:
+			raise script_exhausted()
+		batch = self.batches.pop(0)
+		self.injected = clock()
+		pygame.event.post(pygame.event.Event(self.wakeup))
+		return batch
+
+	def callback(self):
+
+		if self.injected != None:
+			self.latencies.append(clock()-self.injected)
+			self.injected = None
+
+def hook_callbacks(feed):
+
+	"""Reports every CLICK and CHANGE callback to the feed"""
+
+	from pgu import gui
+	send = gui.Widget.send
+	def func(widget, code, event=None):
+		if code in (gui.CLICK, gui.CHANGE) and code in widget.connects:
+			feed[0].callback()
+		return send(widget, code, event)
+	gui.Widget.send = func
+
+# The benchmark cases: plug-in, case name, variables and a function that
+# returns the event script for a prepared item.
+
+def script_multiple_choice(item):
+
+	from pgu import gui
+	batches = []
+	for w in find(item.app.widget, gui.Radio) + \
+		find(item.app.widget, gui.Checkbox):
+		if visible(w):
+			batches += click(w)
+	# Scroll long lists of choices all the way down with the mouse wheel
+	for a in find(item.app.widget, gui.VirtualArea):
+		pos = a.get_abs_rect().center
+		batches.append(motion(pos))
+		for i in range(a.source.count()):
+			batches.append([pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos,
+				button=5)])
+	return batches + click(find(item.app.widget, gui.Button)[-1])
+
+def script_rating_scale(item):
+
+	from pgu import gui
+	batches = []
+	for w in item.img_list:
+		batches += click(w)
+	return batches + click(find(item.app.widget, gui.Button)[-1])
+
+def script_open_question(n):
+
+	def script(item):
+		from pgu import gui
+		text = ("lorem ipsum dolor sit amet " * (n//27+1))[:n]
+		return click(item.text_area) + typing(text) + \
+			click(find(item.app.widget, gui.Button)[-1])
+	return script
+
+def script_text_screen(item):
+
+	from pgu import gui
+	return sweep() + click(find(item.app.widget, gui.Button)[-1])
+
+def script_questionnaire_page(item):
+
+	from pgu import gui
+	batches = []
+	# Only the questions that are visible without scrolling are answered
+	screen = pygame.Rect((0, 0), resolution)
+	for w in find(item.app.widget, gui.Radio):
+		if screen.collidepoint(w.get_abs_rect().center):
+			batches += click(w)
+	return batches + click(find(item.app.widget, gui.Button)[-1])
+
+def words(n):
+
+	return "\n".join(["lorem ipsum dolor sit amet consectetur adipiscing " \
+		"elit sed do"] * (n//12+1))
+
+cases = []
+for n in (3, 10, 50, 1000):
+	cases.append(("multiple_choice", "choices=%d" % n, {
+		"choices" : ";".join(["Choice %d" % i for i in range(n)])},
+		script_multiple_choice))
+for n in (5, 20, 100):
+	cases.append(("rating_scale", "maximum_rating=%d" % n, {
+		"maximum_rating" : n}, script_rating_scale))
+for n in (10, 100, 1000):
+	cases.append(("open_question", "text=%d" % n, {},
+		script_open_question(n)))
+for n in (10, 100, 1000):
+	cases.append(("text_screen", "words=%d" % n, {"question" : words(n)},
+		script_text_screen))
+for n in (10, 120):
+	cases.append(("questionnaire_page", "questions=%d" % n, {
+		"questions" : "\n".join(["choice;q%d;Question %d;Yes;Maybe;No" % (i, i)
+		for i in range(n)]), "allow_empty" : "yes"},
+		script_questionnaire_page))
+for n in (100, 1000):
+	cases.append(("slider", "positions=%d" % n, {"slider_width" : 800}, n))
+
+def peak_memory():
+
+	"""Returns the peak resident set size in kB, or None if unknown"""
+
+	try:
+		import resource
+	except ImportError:
+		return None
+	rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	if sys.platform == "darwin":
+		# Reported in bytes rather than kB
+		rss /= 1024
+	return rss
+
+def run_case(plugin, name, variables, script):
+
+	"""Runs a single case in this process and returns its results"""
+
+	pygame.init()
+	pygame.display.set_mode(resolution)
+	install_stubs()
+	from pgu import gui
+	gui.App.refresh_rate = refresh_rate
+
+	module = load_plugin(plugin)
+	exp = stub_experiment()
+	item = getattr(module, plugin)(plugin, exp)
+	for var, val in variables.items():
+		setattr(item, var, val)
+
+	if plugin == "slider":
+		w, h = resolution
+		stub_mouse.script = [(i*(w-1)//script, h//2) for i in range(script)]
+	feed = [None]
+	hook_callbacks(feed)
+
+	t0 = clock()
+	item.prepare()
+	build = clock()-t0
+
+	if plugin != "slider":
+		feed[0] = event_feed(item.app, script(item))
+		timer = item.app.instrument()
+
+	t0 = clock()
+	item.run()
+	duration = clock()-t0
+
+	results = {"plugin" : plugin, "case" : name, "build" : build,
+		"peak_memory" : peak_memory()}
+	if plugin == "slider":
+		results["fps"] = 1000.*stub_canvas.shown/duration
+		results["latency_mean"] = results["latency_max"] = None
+	else:
+		results["fps"] = 1000.*timer.frames/duration
+		latencies = feed[0].latencies
+		if latencies:
+			results["latency_mean"] = sum(latencies)/len(latencies)
+			results["latency_max"] = max(latencies)
+		else:
+			results["latency_mean"] = results["latency_max"] = None
+	return results
+
+def find_case(name):
+
+	"""Returns the case with a given name (plug-in/case) or index"""
+
+	for plugin, case, variables, script in cases:
+		if name == "%s/%s" % (plugin, case):
+			return plugin, case, variables, script
+	try:
+		return cases[int(name)]
+	except (ValueError, IndexError):
+		raise SystemExit("Unknown case '%s', use one of: %s" % (name,
+			", ".join(["%s/%s" % (c[0], c[1]) for c in cases])))
+
+def main():
+
+	args = sys.argv[1:]
+	if "--case" in args:
+		# Run a single case, and report the results to the parent process
+		print(json.dumps(run_case(*find_case(args[args.index("--case")+1]))))
+		return
+
+	results = []
+	print("%-16s %-18s %10s %10s %10s %10s %12s" % ("plugin", "case",
+		"build (ms)", "fps", "lat (ms)", "max (ms)", "memory (kB)"))
+	for i in range(len(cases)):
+		out = subprocess.check_output([sys.executable,
+			os.path.abspath(__file__), "--case", str(i)])
+		r = json.loads(out.decode().strip().splitlines()[-1])
+		results.append(r)
+		print("%-16s %-18s %10.1f %10.1f %10s %10s %12s" % (r["plugin"],
+			r["case"], r["build"], r["fps"],
+			"-" if r["latency_mean"] == None else "%.2f" % r["latency_mean"],
+			"-" if r["latency_max"] == None else "%.2f" % r["latency_max"],
+			r["peak_memory"]))
+
+	if "--json" in args:
+		with open(args[args.index("--json")+1], "w") as f:
+			json.dump(results, f, indent=1)
+
+if __name__ == "__main__":
+	main()
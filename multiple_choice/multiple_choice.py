@@ -26,7 +26,8 @@ from PyQt4 import QtGui, QtCore
 
 path = os.path.join(os.path.dirname(os.path.split(__file__)[0]), "multiple_choice")
 sys.path.append(path)
-from pgu import gui, html
+from pgu import gui
+import questionnaire_resources
 
 class multiple_choice(item.item):
 
@@ -78,61 +79,22 @@ class multiple_choice(item.item):
 		# Pass the word on to the parent
 		item.item.prepare(self)
 
-		#generic_response.generic_response.prepare(self)
-		return True
-
-	def set_response(self, response):
-
-		"""
-		Set the response and response_time
-
-		Arguments:
-		response -- the response
-		"""
-
-		# Sanitize unicode. Due to a bug in usanitize() we need to convert it
-		# to a QString first.
-		response = self.experiment.usanitize(unicode(QtCore.QString(response)))
-
-		# The response time if based on the first selection
-		if self.get("response_time") == "None":
-			self.experiment.set("response_time", self.time() - self.sri)
-
-		# If only a single response is allowed, simply set the response
-		if self.get("allow_multiple") == "no":
-			self.experiment.set("response", response)
-
-		# If multiple responses are allowed, handle selection and deselection
-		# by storing the response in a semicolon-separated list
-		else:
-			resp = str(self.get("response")).split(";")
-			if resp == ["None"]:
-				resp = [response]
-			elif response not in resp:
-				resp.append(response)
-			else:
-				resp.remove(response)
-			if len(resp) == 0:
-				resp = ["None"]
-			self.experiment.set("response", ";".join(resp))
+		t0 = self.time()
 
-		# Optionally quit the app right away
-		if self.get("accept_on_click") == "yes":
-			self.app.quit()
-
-	def run(self):
-
-		"""Run the item"""
+		# Create the app. On a software display, only the widgets that change
+		# are redrawn.
+		self.app = gui.Desktop(item=self, dirty_rects=questionnaire_resources.software_display())
+		self.app.connect(gui.QUIT, self.app.quit, None)
+		# Merge mouse motion, so that fast mouse movements don't pile up
+		self.app.coalesce_motion = True
 
-		# Initialize the item
-		self.set_item_onset()
-		self.sri = self.time()
-		self.experiment.set("response", None)
-		self.experiment.set("response_time", None)
+		# Optionally record how long every frame takes
+		if self.has("frame_timing") and self.get("frame_timing") == "yes":
+			self.app.instrument()
 
-		# Create the app
-		self.app = gui.Desktop(item=self)
-		self.app.connect(gui.QUIT, self.app.quit, None)
+		# Load and convert all theme images and fonts that the widgets can
+		# need, so that this doesn't happen while the item is on screen
+		self.app.theme.preload(["desktop", "document", "label", "radio", "checkbox", "button", "scrollarea", "vscrollbar"])
 
 		# Create a list of choices
 		choices = []
@@ -141,12 +103,12 @@ class multiple_choice(item.item):
 
 		pad = 0 # The maximum line length, used to pad the options
 
-		# Create an HTML document for the content
-		doc = html.HTML("")
-		for l in self.experiment.unsanitize(self.get("question")).split("\n"):
-			doc.add(gui.Label(l))
+		# Create an HTML document for the content. The rendered document is
+		# reused when the same question is shown again.
+		question = self.experiment.unsanitize(self.get("question"))
+		for l in question.split("\n"):
 			pad = max(pad, len(l))
-			doc.br(0)
+		doc = questionnaire_resources.question_document(self.experiment, question)
 
 		# Determine the colspan
 		if self.get("orientation") == "vertical":
@@ -162,7 +124,22 @@ class multiple_choice(item.item):
 		# A group for the responses
 		group = gui.Group()
 
-		if self.get("orientation") == "vertical":
+		# The height that is left for the choices in the vertical orientation,
+		# below the question and above the accept button. Only lists of
+		# choices that don't fit in there scroll.
+		available = self.get("height") - doc.value.get_height()
+		if self.get("accept_on_click") == "no":
+			available -= 32
+
+		if self.get("orientation") == "vertical" and len(choices)*32 > available:
+
+			# Only the visible choices get widgets, which are reused for other
+			# choices when the list scrolls
+			rows = choice_rows(self, choices, group, pad)
+			c.tr()
+			c.td(gui.VirtualArea(rows, self.get("width") - 64, max(32, available // 32 * 32), 32), colspan=span, align=-1)
+
+		elif self.get("orientation") == "vertical":
 
 			# In the vertical orientation each choice is in a row
 			for option in choices:
@@ -203,15 +180,147 @@ class multiple_choice(item.item):
 			e.connect(gui.CLICK, self.app.quit, None)
 			c.td(e, colspan=span, align=-1, height=32, valign=1)
 
+		# Build and pre-render the first frame, so that run() only needs to
+		# show it
+		self.app.prepare(c)
+		self.experiment.set("prepare_time_%s" % self.name, self.time() - t0)
+
+		#generic_response.generic_response.prepare(self)
+		return True
+
+	def set_response(self, response):
+
+		"""
+		Set the response and response_time
+
+		Arguments:
+		response -- the response
+		"""
+
+		# Sanitize unicode. Due to a bug in usanitize() we need to convert it
+		# to a QString first.
+		response = self.experiment.usanitize(unicode(QtCore.QString(response)))
+
+		# The response time if based on the first selection
+		if self.get("response_time") == "None":
+			self.experiment.set("response_time", self.time() - self.sri)
+
+		# If only a single response is allowed, simply set the response
+		if self.get("allow_multiple") == "no":
+			self.experiment.set("response", response)
+
+		# If multiple responses are allowed, handle selection and deselection
+		# by storing the response in a semicolon-separated list
+		else:
+			resp = str(self.get("response")).split(";")
+			if resp == ["None"]:
+				resp = [response]
+			elif response not in resp:
+				resp.append(response)
+			else:
+				resp.remove(response)
+			if len(resp) == 0:
+				resp = ["None"]
+			self.experiment.set("response", ";".join(resp))
+
+		# Optionally quit the app right away
+		if self.get("accept_on_click") == "yes":
+			self.app.quit()
+
+	def run(self):
+
+		"""Run the item"""
+
+		# Show the prepared form and initialize the item
+		self.app.show()
+		self.set_item_onset()
+		self.sri = self.time()
+		self.experiment.set("response", None)
+		self.experiment.set("response_time", None)
+
 		# Keep running the app until a response has been received
 		while True:
-			self.app.run(c)
+			self.app.run(event_driven=True)
 			if self.get("response") != "None" or self.get("allow_empty") == "yes":
 				break
 
+		# Log the frame timing statistics, if they have been recorded
+		if self.app.timer:
+			self.app.timer.log(self.experiment, "frame_%s" % self.name)
+
 		# Return success
 		return True
 
+class choice_rows(gui.RowSource):
+
+	"""The rows of a scrolling list of choices"""
+
+	def __init__(self, item, choices, group, pad):
+
+		"""
+		Constructor
+
+		Arguments:
+		item -- the multiple_choice item
+		choices -- a list of choices
+		group -- the group of the response buttons
+		pad -- the length to which the labels are padded
+		"""
+
+		self.item = item
+		self.choices = choices
+		self.group = group
+		self.pad = pad
+
+	def count(self):
+
+		"""Returns the number of choices"""
+
+		return len(self.choices)
+
+	def create(self):
+
+		"""Returns a new row, with a response button and a label"""
+
+		if self.item.get("allow_multiple") == "no":
+			r = gui.Radio(self.group)
+		else:
+			r = gui.Checkbox(self.group)
+		r.connect(gui.CLICK, self.click)
+		l = gui.Label("")
+		t = gui.Table()
+		t.tr()
+		t.td(r, align=-1, width=32, height=32)
+		t.td(l, align=-1, height=32)
+		t.button = r
+		t.label = l
+		return t
+
+	def bind(self, widget, row):
+
+		"""
+		Fill in a row for a choice
+
+		Arguments:
+		widget -- a row from create()
+		row -- the index of the choice
+		"""
+
+		widget.button.value = self.choices[row]
+		widget.button.repaint()
+		widget.label.set_text(self.choices[row].ljust(self.pad))
+
+	def click(self, _widget):
+
+		"""
+		Set the response to the choice of a clicked button
+
+		Arguments:
+		_widget -- the button
+		"""
+
+		self.item.set_response(_widget.value)
+
 class qtmultiple_choice(multiple_choice, qtplugin.qtplugin):
 
 	"""The GUI aspect of the plugin"""
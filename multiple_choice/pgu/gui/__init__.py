@@ -10,7 +10,7 @@ try:
 except KeyError:
 	__builtins__["basestring"] = str
 
-from .theme import Theme
+from .theme import Theme, shared_theme
 from .style import Style
 from .widget import Widget
 from .surface import subsurface, ProxySurface
@@ -19,9 +19,9 @@ from .const import *
 from .container import Container
 from .app import App, Desktop
 from .table import Table
-from .document import Document
+from .document import Document, TextRun
 #html
-from .area import SlideBox, ScrollArea, List 
+from .area import SlideBox, ScrollArea, List, VirtualArea, RowSource
 
 from .form import Form
 from .group import Group
@@ -33,6 +33,7 @@ from .keysym import Keysym
 from .slider import VSlider, HSlider, VScrollBar, HScrollBar
 from .select import Select
 from .misc import ProgressBar
+from .timing import FrameTimer
 
 from .menus import Menus
 from .dialog import Dialog, FileDialog
@@ -1,12 +1,14 @@
 """Defines the top-level application widget"""
 
+import math
 import pygame
 from pygame.locals import *
 
 from . import pguglobals
 from . import container
+from . import area
+from . import events
 from .const import *
-from libopensesame import exceptions
 
 class App(container.Container):
 	"""The top-level widget for an application.
@@ -32,16 +34,61 @@ class App(container.Container):
 	# this is used when transforming the mouse position from screen 
 	# coordinates into the subsurface coordinates.
 	appArea = None
+	# The color that the screen is cleared to before the widgets are painted
+	backdrop = (255, 255, 255)
+	# Whether App.loop only repaints invalidated widgets and presents them
+	# with pygame.display.update(rects), instead of repainting and flipping
+	# the entire screen on every iteration. This requires a software display
+	# surface, because a hardware (double-buffered) display does not keep the
+	# previous frame around.
+	dirty_rects = False
+	# Whether App.run blocks on the event queue (see App.run)
+	event_driven = False
+	# The maximum number of frames per second drawn in the event-driven mode,
+	# which should match the refresh rate of the display
+	refresh_rate = 60
+	# The FrameTimer that records the duration of each frame, if any (see
+	# App.instrument)
+	timer = None
+	# Whether App.dispatch merges consecutive mouse motion events into one,
+	# and skips motion events that can't change the hovered widget (see
+	# App.coalesce)
+	coalesce_motion = False
+	# The event that is reused to translate mouse events into the coordinates
+	# of the appArea
+	_translated = None
+	# The app whose pre-rendered first frame is waiting to be shown. Only one
+	# such frame is kept, because every frame is a copy of the whole screen.
+	_pending = None
+
+	def __init__(self, item=None, theme=None, dirty_rects=False, **params):
+		"""Create a new application given the (optional) theme instance.
 
-	def __init__(self, item=None, theme=None, **params):
-		"""Create a new application given the (optional) theme instance."""
+		Keyword arguments:
+			item -- the OpenSesame item that runs this application
+			theme -- the theme to use (the shared default theme if not 
+				specified)
+			dirty_rects -- True to enable the dirty-rectangle presentation mode
+				(see App.dirty_rects)
+
+		"""
 		self.set_global_app()
 
 		if theme == None: 
-			from .theme import Theme
-			theme = Theme()
+			# Use the default theme, which is only loaded once per experiment
+			from .theme import shared_theme
+			scope = None
+			if item:
+				scope = item.experiment
+			theme = shared_theme(scope=scope)
 		self.theme = theme
 		self.item = item
+		self.dirty_rects = dirty_rects
+		# The widgets that were handed a cached size for other arguments than
+		# those of their current layout, and the number of layouts that are
+		# being computed (see Theme.resize and App.realize)
+		self._unrealized = []
+		self._layout_depth = 0
 
 		params['decorate'] = 'app'
 		container.Container.__init__(self,**params)
@@ -52,6 +99,15 @@ class App(container.Container):
 
 		self.screen = None
 		self.container = None
+		# The pixels underneath the software cursor and the region of the
+		# screen they were taken from (only used in dirty_rects mode)
+		self._cursor_bkgr = None
+		self._cursor_rect = None
+		# The first frame as pre-rendered by App.prepare, and whether the 
+		# first frame still has to be shown (even if it is no longer kept)
+		self._frame = None
+		self._unshown = False
+		self._prepared = False
 
 	def set_global_app(self):
 		"""Registers this app as _the_ global PGU application. You 
@@ -96,6 +152,8 @@ class App(container.Container):
 		for w in self.windows:
 			w.rect.size = w.resize()
 
+		# The widgets may have moved, so the spatial indices need rebuilding
+		container.Container.generation += 1
 		self._chsize = False
 
 	def init(self, widget=None, screen=None, area=None):
@@ -131,6 +189,15 @@ class App(container.Container):
 		self.focus(w)
 		
 		pygame.key.set_repeat(500,30)
+
+		if (self.item):
+			# The item is one of the questionnaire plug-ins, which share
+			# their decoded resources
+			import questionnaire_resources
+			self.cursor_img = questionnaire_resources.load_image(
+				self.item.experiment, "mouse_cursor.png")
+		self._cursor_bkgr = None
+		self._cursor_rect = None
 		
 		self._repaint = True
 		self._quit = False
@@ -146,15 +213,9 @@ class App(container.Container):
 
 		if (self.appArea and hasattr(ev, "pos")):
 			# Translate into subsurface coordinates
-			pos = (ev.pos[0]-self.appArea.x,
-				   ev.pos[1]-self.appArea.y)
-			args = {"pos" : pos}
-			# Copy over other misc mouse parameters
-			for name in ("buttons", "rel", "button"):
-				if (hasattr(ev, name)):
-					args[name] = getattr(ev, name)
-			
-			ev = pygame.event.Event(ev.type, args)
+			if self._translated is None:
+				self._translated = events.TranslatedEvent()
+			ev = self._translated.translate(ev, self.appArea.x, self.appArea.y)
 
 		#NOTE: might want to deal with ACTIVEEVENT in the future.
 		self.send(ev.type, ev)
@@ -172,30 +233,212 @@ class App(container.Container):
 		"""Performs one iteration of the PGU application loop, which
 		processes events and update the pygame display."""
 		self.set_global_app()
+		self.dispatch(self.pump())
+		self.present()
 
-		for e in pygame.event.get():
+	def pump(self):
+		"""Returns the pending pygame events."""
+		return pygame.event.get()
+
+	def dispatch(self, events):
+		"""Passes a list of pygame events on to the application."""
+		if self.coalesce_motion:
+			events = self.coalesce(events)
+		for e in events:
 
 			if e.type == KEYDOWN and e.key == K_ESCAPE:
+				# Imported here, so that the GUI can be used (for example to 
+				# compile a theme) without OpenSesame
+				from libopensesame import exceptions
 				raise exceptions.runtime_error("Escape key pressed!")
+
+			if e.type == MOUSEMOTION and self.coalesce_motion and \
+				self._same_hover(e):
+				continue
 			
 			if not (e.type == QUIT and self.mywindow):
 				self.event(e)
 
+	def coalesce(self, events):
+		"""Returns a list of events in which every run of consecutive mouse
+		motion events is merged into a single event, with the summed 'rel' 
+		and the last 'pos' and 'buttons'. All other events are kept, in the
+		same order."""
+		merged = []
+		last = None
+		for e in events:
+			if e.type == MOUSEMOTION and last != None:
+				rel = last.rel[0]+e.rel[0], last.rel[1]+e.rel[1]
+				last = merged[-1] = pygame.event.Event(MOUSEMOTION, {
+					'pos': e.pos, 'rel': rel, 'buttons': e.buttons})
+				continue
+			merged.append(e)
+			if e.type == MOUSEMOTION:
+				last = e
+			else:
+				last = None
+		return merged
+
+	def _same_hover(self, e):
+		"""Returns True if a mouse motion event would not change which widget
+		is hovered, and nothing else listens to it, so that it doesn't need
+		to be routed through the widget tree."""
+		if 1 in e.buttons or self.mywindow or self.windows:
+			# Dragging, or a window may be in the way
+			return False
+		# Follow the hovered widgets down to the deepest one
+		w = self
+		while True:
+			if MOUSEMOTION in w.connects or isinstance(w, area.SlideBox):
+				# Listens to motion, or translates the position
+				return False
+			if not isinstance(w, container.Container):
+				break
+			if not w.myhover:
+				# The motion may enter a child widget
+				return False
+			w = w.myhover
+		pos = e.pos
+		if self.appArea:
+			pos = pos[0]-self.appArea.x, pos[1]-self.appArea.y
+		return w.get_abs_rect().collidepoint(pos)
+
+	def present(self):
+		"""Draws the current state of the application, including the mouse
+		cursor, to the pygame display."""
+		if self.dirty_rects:
+			self._present_dirty()
+			return
+
 		# This is the original method of updating the screen, but it doesn't
 		# work with a HW surface. Therefore, we resort to the very inefficient
 		# method of always updating the entire screen and manually drawing the
-		# mouse pointer.
-		
-		#rects = self.update(self.screen)
-		#pygame.display.update(rects)
+		# mouse pointer. The dirty_rects mode restores the original method
+		# for software surfaces.
+		self.paint_frame()
+		self.draw_cursor()
+		self.flip()
+
+	def paint_frame(self, s=None):
+		"""Clears the screen (or the given surface) to the backdrop color and
+		paints the entire widget tree onto it."""
+		if s == None:
+			s = self.screen
+		if self._chsize:
+			self.resize()
+		self._repaint = False
+		s.fill(self.backdrop)
+		container.Container.paint(self, s)
 
-		self.screen.fill( (255, 255, 255) )
-		container.Container.paint(self, self.screen)
+	def draw_cursor(self):
+		"""Draws the mouse cursor onto the screen and returns the rect that it
+		covers. In the dirty_rects mode the pixels underneath are saved, so
+		that the cursor can be removed again."""
 		pos = pygame.mouse.get_pos()
 		#cursor = [ (pos), (pos[0]+5, pos[1]), (pos[0], pos[1]+5), pos, (pos[0]+10, pos[1]+10) ]
 		#pygame.draw.aalines(self.screen, (0, 0, 0), False, cursor, 2)
+		rect = self.cursor_img.get_rect(topleft=pos).clip(
+			self.screen.get_rect())
+		if self.dirty_rects:
+			if rect.w and rect.h:
+				self._cursor_bkgr = self.screen.subsurface(rect).copy()
+			else:
+				# The cursor is off the screen
+				self._cursor_bkgr = None
+			self._cursor_rect = rect
 		self.screen.blit(self.cursor_img, pos)
-		pygame.display.flip()
+		return rect
+
+	def instrument(self, timer=None):
+		"""Start recording how much time each frame spends on pumping events,
+		dispatching them, painting, drawing the cursor and flipping the 
+		display. The methods for these phases are wrapped, so an application
+		that isn't instrumented runs without any timing overhead.
+
+		Keyword arguments:
+			timer -- the timing.FrameTimer to record into (a new one if not
+				specified)
+
+		Returns the timer.
+		"""
+		if self.timer:
+			return self.timer
+		from . import timing
+		if timer == None:
+			timer = timing.FrameTimer(budget=1./self.refresh_rate)
+		self.timer = timer
+		self.pump = timer.wrap(timing.PUMP, self.pump)
+		self.dispatch = timer.wrap(timing.DISPATCH, self.dispatch)
+		self.paint_frame = timer.wrap(timing.PAINT, self.paint_frame)
+		self.paint_changes = timer.wrap(timing.PAINT, self.paint_changes)
+		self.draw_cursor = timer.wrap(timing.CURSOR, self.draw_cursor)
+		self.flip = timer.wrap(timing.FLIP, self.flip)
+		self.present = timer.wrap_frame(self.present)
+		self.show = timer.wrap_frame(self.show)
+		return timer
+
+	def realize(self):
+		"""Lay out the widgets that were handed a cached size for other
+		arguments than those of their current layout, if these were the last
+		arguments that they were resized with. This is done automatically when
+		the outermost resize() returns."""
+		while self._unrealized:
+			w = self._unrealized.pop()
+			key = w._layout_want
+			if key != w._layout_key and w._layout != None:
+				w._layout.pop(key, None)
+				w.resize(key[0],key[1])
+
+	def invalidated(self):
+		"""Returns True if any part of the application has requested a
+		repaint or resize since the last time it was drawn."""
+		return bool(self._repaint or self._chsize or self.toupdate)
+
+	def _present_dirty(self):
+		"""Repaints only the invalidated widgets, moves the software cursor
+		by restoring the pixels underneath it, and updates only the changed
+		regions of the display."""
+		old_rect = self._cursor_rect
+
+		# Take the cursor off the screen, so that the widgets are repainted
+		# onto a clean surface.
+		if self._cursor_bkgr is not None:
+			self.screen.blit(self._cursor_bkgr, old_rect)
+
+		rects = self.paint_changes()
+
+		# Save the pixels underneath the new cursor position and draw it
+		rect = self.draw_cursor()
+
+		if rects or rect != old_rect:
+			rects.append(rect)
+			if old_rect:
+				rects.append(old_rect)
+		if not rects:
+			return
+
+		if self.appArea:
+			# Translate the rects from subsurface coordinates into
+			# full display coordinates.
+			rects = [r.move(self.appArea.topleft) for r in rects]
+		self.flip(rects)
+
+	def paint_changes(self):
+		"""Repaints the widgets that have been invalidated (or everything, if
+		a full repaint is pending) and returns the list of changed rects."""
+		if self._repaint or self._chsize:
+			# Not self.paint_frame, which may be wrapped by App.instrument
+			App.paint_frame(self)
+			return [self.screen.get_rect()]
+		return container.Container.update(self, self.screen)
+
+	def flip(self, rects=None):
+		"""Updates the given rects of the display, or the entire display if
+		no rects are given."""
+		if rects == None:
+			pygame.display.flip()
+		else:
+			pygame.display.update(rects)
 				
 	def paint(self,screen=None):
 		"""Renders the application onto the given pygame surface"""
@@ -239,7 +482,7 @@ class App(container.Container):
 
 		return rects
 	
-	def run(self, widget=None, screen=None, delay=2): 
+	def run(self, widget=None, screen=None, delay=2, event_driven=None): 
 		"""Run an application.
 
 		Automatically calls App.init and then forever loops while
@@ -249,15 +492,101 @@ class App(container.Container):
 			widget -- the top-level widget to use
 			screen -- the pygame surface to render to
 			delay -- the delay between updates (in milliseconds)
+			event_driven -- True to block on the event queue instead of 
+				polling every 'delay' ms, None to use App.event_driven
+
+		If App.prepare has been called, the prepared application is shown
+		(see App.show) instead of being initialized again.
+
 		"""
-		self.init(widget,screen)
-		self.cursor_img = pygame.image.load(self.item.experiment.resource("mouse_cursor.png"))
+		if self._prepared:
+			# The first frame is already on the display after this
+			self.show()
+			self._prepared = False
+			pending = False
+		else:
+			self.init(widget,screen)
+			pending = True
+		if event_driven == None:
+			event_driven = self.event_driven
+		if event_driven:
+			self._run_event_driven(pending)
+			return
 		while not self._quit:
 			self.loop()
 			pygame.time.wait(delay)
 
+	def prepare(self, widget=None, screen=None):
+		"""Initialize the application and pre-render its first frame into an
+		off-screen surface, without touching the display. The next call to
+		App.show or App.run presents this frame, so that all the work of 
+		building and painting the widget tree is done beforehand.
+
+		Keyword arguments:
+			widget -- the top-level widget to use
+			screen -- the pygame surface to render to
+		"""
+		self.init(widget,screen)
+		if App._pending is not None and App._pending is not self:
+			# Release the frame of an app that was prepared earlier, which
+			# paints its first frame when it is shown instead
+			App._pending._frame = None
+		self._frame = self.screen.copy()
+		# Not self.paint_frame, because this is not part of a frame that is
+		# shown
+		App.paint_frame(self, self._frame)
+		App._pending = self
+		self._unshown = True
+		self._prepared = True
+
+	def show(self):
+		"""Copy the frame that was pre-rendered by App.prepare to the display
+		and flip it. Does nothing if the prepared frame has been shown 
+		already."""
+		if not self._unshown:
+			return
+		self.set_global_app()
+		if self._frame != None:
+			self.screen.blit(self._frame, (0, 0))
+		else:
+			# Another app has been prepared since, which released the frame
+			App.paint_frame(self)
+		self._frame = None
+		self._unshown = False
+		if App._pending is self:
+			App._pending = None
+		self.draw_cursor()
+		self.flip()
+
+	def _run_event_driven(self, pending=True):
+		"""Sleeps on the SDL event queue and only draws a frame after input 
+		or an invalidation, at most once per display refresh."""
+		frame = 1000. / self.refresh_rate
+		last = pygame.time.get_ticks() - frame
+		while not self._quit:
+			if pending or self.invalidated():
+				wait = int(math.ceil(last + frame - pygame.time.get_ticks()))
+				if wait <= 0:
+					self.present()
+					last = pygame.time.get_ticks()
+					pending = False
+					continue
+				# Wake up when the next frame is due, unless input arrives
+				# before that.
+				pygame.time.set_timer(WAKEUP, wait)
+			e = pygame.event.wait()
+			pygame.time.set_timer(WAKEUP, 0)
+			events = [ev for ev in [e] + self.pump() 
+				if ev.type not in (NOEVENT, WAKEUP)]
+			if events:
+				self.set_global_app()
+				self.dispatch(events)
+				pending = True
+
 	def reupdate(self,w=None): 
-		pass
+		if w:
+			# Only recorded so that App.invalidated() knows about it
+			self.toupdate[w] = w
 
 	def repaint(self,w=None): 
 		self._repaint = True
@@ -5,6 +5,7 @@ import os
 from . import pguglobals
 from .const import *
 from . import surface
+from . import events
 from . import container, table
 from . import group
 from . import basic, button, slider
@@ -20,6 +21,8 @@ class SlideBox(container.Container):
 	"""
 
 	_widget = None
+	# The event that is reused to pass scrolled mouse events on
+	_scrolled = None
 	
 	def __init__(self, widget, width, height, **params):
 		"""SlideBox constructor.
@@ -120,13 +123,9 @@ class SlideBox(container.Container):
 		if e.type in [MOUSEBUTTONDOWN, MOUSEBUTTONUP, MOUSEMOTION]:
 			pos = (e.pos[0] + self.offset[0], e.pos[1] + self.offset[1])
 			if self.max_rect.collidepoint(pos):
-				e_params = {'pos': pos }
-				if e.type == MOUSEMOTION: 
-					e_params['buttons'] = e.buttons
-					e_params['rel'] = e.rel
-				else:
-					e_params['button'] = e.button
-				e = pygame.event.Event(e.type, e_params)
+				if self._scrolled is None:
+					self._scrolled = events.TranslatedEvent()
+				e = self._scrolled.translate(e, -self.offset[0], -self.offset[1])
 		container.Container.event(self, e)
 
 #class SlideBox(Area):
@@ -335,6 +334,298 @@ class ScrollArea(table.Table):
 		
 
 
+class RowSource(object):
+	"""The rows of a VirtualArea.
+
+	A VirtualArea only has widgets for the rows that are (nearly) visible.
+	These widgets are created by create() and filled in for a row by bind().
+	When the area scrolls, the widgets of rows that have gone out of view are
+	bound to the rows that come into view, so bind() must replace everything
+	that a previous bind() filled in.
+
+	Example:
+		class Words(gui.RowSource):
+			def __init__(self, words):
+				self.words = words
+			def count(self):
+				return len(self.words)
+			def create(self):
+				return gui.Label("")
+			def bind(self, widget, row):
+				widget.set_text(self.words[row])
+
+	"""
+
+	def count(self):
+		"""Returns the number of rows."""
+		return 0
+
+	def create(self):
+		"""Returns a new row widget."""
+		raise NotImplementedError()
+
+	def bind(self, widget, row):
+		"""Fill in a row widget for the given row."""
+		raise NotImplementedError()
+
+class _VirtualRows(container.Container):
+	"""The rows of a VirtualArea that have a widget. The rows are positioned
+	relative to the visible part of the area, so that rows that are scrolled
+	(partly) out of view lie (partly) outside of it."""
+
+	def __init__(self, area, **params):
+		container.Container.__init__(self, **params)
+		self.area = area
+		# The row widgets, hashed by row, and the widgets that are not bound
+		# to a row
+		self.bound = {}
+		self.pool = []
+		# The first row that has a widget
+		self.first = 0
+		self.surface = None
+		# Whether the rows have scrolled since they were last copied onto the
+		# screen
+		self._scrolled = False
+
+	def window(self):
+		"""Returns the first and the last (exclusive) row that need a widget:
+		the visible rows, plus the overscan on either side."""
+		a = self.area
+		first = max(0, a.offset//a.row_height - a.overscan)
+		last = min(a.source.count(),
+			(a.offset+self.style.height)//a.row_height + 1 + a.overscan)
+		return first, max(first, last)
+
+	def scroll(self):
+		"""Bind widgets to the rows that have come into view, using the widgets
+		of the rows that have gone out of view, and move the rows to the
+		current offset."""
+		a = self.area
+		first, last = self.window()
+		shift = (self.first - first)*a.row_height
+		# The widgets are not added and removed with add() and remove(),
+		# because those would lay out the whole application again. The rows
+		# are laid out here instead.
+		for row in list(self.bound.keys()):
+			if row < first or row >= last:
+				w = self.bound.pop(row)
+				self.blur(w)
+				self.widgets.remove(w)
+				self.pool.append(w)
+		for row in range(first, last):
+			if row not in self.bound:
+				if self.pool:
+					w = self.pool.pop()
+				else:
+					w = a.source.create()
+				w.container = self
+				self.widgets.append(w)
+				self.bound[row] = w
+				a.source.bind(w, row)
+				self.relayout(w)
+		self.first = first
+		for row, w in self.bound.items():
+			w.rect.y = row*a.row_height - a.offset
+		if self.surface != None and self.surface.get_height() == \
+			self._height() and basic.is_color(self.style.background):
+			# The rows that stay in view are moved on the surface, so that
+			# only the new rows need to be painted. The new rows have been
+			# marked for painting by relayout().
+			self.surface.scroll(0, shift)
+			self._scrolled = True
+			self.reupdate()
+		else:
+			self.repaint()
+
+	def resize(self, width=None, height=None):
+		a = self.area
+		for row, w in self.bound.items():
+			w.rect.w, w.rect.h = w.resize(self.style.width, a.row_height)
+			w.rect.x, w.rect.y = 0, row*a.row_height - a.offset
+		return self.style.width, self.style.height
+
+	def relayout(self, w):
+		# All rows have the same size, so a row can be laid out on its own
+		if w not in self.widgets:
+			return False
+		w.rect.w, w.rect.h = w.resize(self.style.width, self.area.row_height)
+		self.repaint(w)
+		return True
+
+	def _top(self):
+		# The position of the first row with a widget
+		return self.first*self.area.row_height - self.area.offset
+
+	def _height(self):
+		# The height of the surface with the rows that have a widget
+		return max(1, len(self.bound)*self.area.row_height)
+
+	def _hits(self, pos):
+		# The rows are stacked, so the row at a position follows from the
+		# offset
+		w = self.bound.get((pos[1] + self.area.offset)//self.area.row_height)
+		if w == None:
+			return []
+		return [w]
+
+	def paint(self, s):
+		# The rows with a widget are painted onto a surface of their own, and
+		# the visible part of this surface is then copied onto s
+		self.toupdate = {}
+		self.topaint = {}
+		self._scrolled = False
+		top = self._top()
+		size = s.get_width(), self._height()
+		if self.surface == None or self.surface.get_size() != size:
+			self.surface = pygame.Surface(size, 0, s)
+		self.surface.blit(s, (0, -top))
+		pguglobals.app.theme.render(self.surface, self.style.background,
+			self.surface.get_rect())
+		for w in self.widgets:
+			w.paint(surface.subsurface(self.surface, w.rect.move(0, -top)))
+		s.blit(self.surface, (0, top))
+
+	def update(self, s):
+		top = self._top()
+		updates = []
+		if self.myfocus: self.toupdate[self.myfocus] = self.myfocus
+		app = pguglobals.app
+		for w in self.topaint:
+			r = w.rect.move(0, -top)
+			sub = surface.subsurface(self.surface, r)
+			if self._scrolled:
+				# A new row, on the pixels of the row that it replaces
+				app.theme.render(self.surface, self.style.background, r)
+			elif app and app.dirty_rects and not w.background:
+				sub.fill(app.backdrop)
+			w.paint(sub)
+			updates.append(pygame.Rect(w.rect))
+		for w in self.toupdate:
+			us = w.update(surface.subsurface(self.surface, w.rect.move(0, -top)))
+			if us:
+				for u in us:
+					updates.append(pygame.Rect(u.x+w.rect.x, u.y+w.rect.y, u.w, u.h))
+		self.topaint = {}
+		self.toupdate = {}
+
+		if self._scrolled:
+			# All rows have moved, so the whole visible part is copied
+			self._scrolled = False
+			s.blit(self.surface, (0, top))
+			return [s.get_rect()]
+
+		# Only the visible parts are copied onto s
+		clip = s.get_rect()
+		rects = []
+		for r in updates:
+			r = r.clip(clip)
+			if r.w and r.h:
+				s.blit(self.surface, r, r.move(0, -top))
+				rects.append(r)
+		return rects
+
+class VirtualArea(table.Table):
+	"""A scrollable list of rows that only has widgets for the rows that are
+	visible.
+
+	The rows are described by a RowSource, and all rows have the same height.
+	Widgets are only created, laid out and painted for the visible rows, plus
+	a few (the overscan) above and below them. As the area scrolls, the
+	widgets of the rows that go out of view are reused for the rows that
+	come into view. A list of 1000 rows therefore takes as long to build and
+	scroll as a list of 10 rows.
+
+	Example:
+		a = gui.VirtualArea(Words(words), 300, 200, 24)
+
+	"""
+
+	def __init__(self, source, width, height, row_height, overscan=2, step=None, **params):
+		"""VirtualArea constructor.
+
+		Arguments:
+			source -- the RowSource that describes the rows
+			width, height -- size of the area
+			row_height -- the height of every row
+			overscan -- the number of rows above and below the visible rows
+				that also get a widget
+			step -- how far clicks on the scrollbar icons scroll (by default
+				one row)
+
+		"""
+		params.setdefault('cls', 'scrollarea')
+		table.Table.__init__(self, width=width, height=height, **params)
+		self.source = source
+		self.row_height = row_height
+		self.overscan = overscan
+		if step == None: step = row_height
+		self.step = step
+		self.offset = 0
+		self.rows = _VirtualRows(self, cls=self.cls+".content")
+		self.vscrollbar = None
+
+	def resize(self, width=None, height=None):
+		rows = self.rows
+		table.Table.clear(self)
+		self.tr()
+		self.td(rows)
+
+		xt,xr,xb,xl = pguglobals.app.theme.getspacing(rows)
+		rows.style.width = self.style.width - (xl+xr)
+		rows.style.height = self.style.height - (xt+xb)
+		total = self.source.count()*self.row_height
+
+		if total > rows.style.height:
+			# The scrollbar is kept, so that it keeps its position
+			vs = self.vscrollbar
+			if vs == None:
+				vs = self.vscrollbar = slider.VScrollBar(self.offset, 0, 65535, 0, step=self.step)
+				vs.connect(CHANGE, self._vscrollbar_changed, None)
+			self.td(vs)
+			vs.style.height = self.style.height
+			vs.rect.w,vs.rect.h = vs.resize()
+			rows.style.width -= vs.rect.w
+			vs.max = total - rows.style.height
+			vs.size = vs.style.height * rows.style.height / max(1,total)
+		else:
+			self.vscrollbar = None
+
+		self.offset = max(0, min(self.offset, total - rows.style.height))
+		rows.scroll()
+		return table.Table.resize(self, width, height)
+
+	def refresh(self):
+		"""Bind the row widgets again, after the rows of the source have
+		changed."""
+		count = self.source.count()
+		for row, w in list(self.rows.bound.items()):
+			if row < count:
+				self.source.bind(w, row)
+		self.chsize()
+
+	def _vscrollbar_changed(self, xxx):
+		self.offset = self.vscrollbar.value
+		self.rows.scroll()
+
+	def set_vertical_scroll(self, offset):
+		if not self.vscrollbar: return
+		self.vscrollbar.value = offset
+
+	def event(self, e):
+		if table.Table.event(self, e):
+			return True
+
+		# Mouse wheel scrolling
+		if self.vscrollbar and e.type == MOUSEBUTTONDOWN:
+			if e.button == 4:
+				self.vscrollbar._click(-1)
+				return True
+			elif e.button == 5:
+				self.vscrollbar._click(1)
+				return True
+		return False
+
+
 class _List_Item(button._button):
 	def __init__(self,label=None,image=None,value=None,**params): #TODO label= could conflict with the module label
 		#param image: an imagez.Image object (optional)
@@ -79,7 +79,13 @@ class Color(widget.Widget):
 	
 
 class Label(widget.Widget):
-	"""A text label widget."""
+	"""A text label widget.
+	
+	The rendered text is cached for every color that the label is painted in
+	(which may change with the pseudo class, as in button labels), so that the
+	text is only rendered again when the text or font changes.
+
+	"""
 
 	def __init__(self, value="", **params):
 		params.setdefault('focusable', False)
@@ -88,22 +94,39 @@ class Label(widget.Widget):
 		self.value = value
 		self.font = self.style.font
 		self.style.width, self.style.height = self.font.size(self.value)
+		# The rendered text, hashed by color, and the text and font that it
+		# was rendered with
+		self._rendered = {}
+		self._rendered_text = None
 	
 	def paint(self,s):
 		"""Renders the label onto the given surface in the upper-left corner."""
-		s.blit(self.font.render(self.value, 1, self.style.color),(0,0))
+		text = (self.value, self.font)
+		if text != self._rendered_text:
+			# The value or font has been changed directly
+			self._rendered = {}
+			self._rendered_text = text
+		color = self.style.color
+		key = tuple(color)
+		try:
+			img = self._rendered[key]
+		except KeyError:
+			img = self._rendered[key] = self.font.render(self.value, 1, color)
+		s.blit(img,(0,0))
 
 	def set_text(self, txt):
 		"""Set the text of this label."""
 		self.value = txt
+		self._rendered = {}
 		# Signal to the application that we need to resize this widget
 		self.chsize()
 
 	def set_font(self, font):
 		"""Set the font used to render this label."""
-		this.font = font
+		self.font = font
+		self._rendered = {}
 		# Signal to the application that we need a resize
-		this.chsize()
+		self.chsize()
 
 	def resize(self,width=None,height=None):
 		# Calculate the size of the rendered text
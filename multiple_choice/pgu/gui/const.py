@@ -17,6 +17,7 @@ PGU specific:
 	OPEN
 	CLOSE
 	INIT
+	WAKEUP
 
 Other:
 	NOATTR
@@ -34,6 +35,8 @@ CHANGE = pygame.locals.USEREVENT + 5
 OPEN = pygame.locals.USEREVENT + 6
 CLOSE = pygame.locals.USEREVENT + 7
 INIT = 'init'
+# Posted by a timer to wake up an event-driven App.run
+WAKEUP = pygame.locals.USEREVENT + 8
 
 class NOATTR: 
 	pass
@@ -5,11 +5,20 @@ from pygame.locals import *
 
 from .const import *
 from . import widget, surface
+from . import events
 from . import pguglobals
 
 class Container(widget.Widget):
 	"""The base container widget, can be used as a template as well as stand alone."""
 
+	# Incremented every time the application lays out its widgets, which makes
+	# the spatial indices of all containers stale
+	generation = 0
+	# A spatial index of the child widgets, see _hits
+	_index = None
+	# The event that is reused to pass mouse events on to child widgets
+	_sub = None
+
 	def __init__(self,**params):
 		widget.Widget.__init__(self,**params)
 		self.myfocus = None
@@ -21,6 +30,47 @@ class Container(widget.Widget):
 		self.toupdate = {}
 		self.topaint = {}
 	
+	def _build_index(self):
+		# Divide the area of the child widgets into a uniform grid of at most
+		# 64x64 cells, and list the widgets that overlap each cell (in their 
+		# original order)
+		rects = [w.rect for w in self.widgets]
+		if rects:
+			bbox = rects[0].unionall(rects)
+		else:
+			bbox = pygame.Rect(0,0,0,0)
+		cs = max(32, bbox.w//64+1, bbox.h//64+1)
+		grid = {}
+		anywhere = []
+		default = widget.Widget.collidepoint
+		for i, w in enumerate(self.widgets):
+			if getattr(w.collidepoint, '__func__', None) is not getattr(default, '__func__', default):
+				# Custom collision testing, so this may be hit anywhere
+				anywhere.append(i)
+				continue
+			r = w.rect
+			if r.w <= 0 or r.h <= 0:
+				continue
+			for cx in range(r.left//cs, (r.right-1)//cs+1):
+				for cy in range(r.top//cs, (r.bottom-1)//cs+1):
+					grid.setdefault((cx, cy), []).append(i)
+		self._index = (Container.generation, len(self.widgets), cs, grid, anywhere)
+
+	def _hits(self, pos):
+		"""Returns the child widgets that may contain the given position, in 
+		the order of self.widgets. The widgets still need to be tested with 
+		collidepoint."""
+		index = self._index
+		if index is None or index[0] != Container.generation or index[1] != len(self.widgets):
+			self._build_index()
+			index = self._index
+		generation, n, cs, grid, anywhere = index
+		hits = grid.get((pos[0]//cs, pos[1]//cs), ())
+		if anywhere:
+			hits = sorted(set(hits).union(anywhere))
+		widgets = self.widgets
+		return [widgets[i] for i in hits]
+
 	def update(self,s):
 		updates = []
 		
@@ -30,9 +80,18 @@ class Container(widget.Widget):
 			if w is self.mywindow:
 				continue
 			else:
-				sub = surface.subsurface(s,w.rect)
+				try:
+					sub = surface.subsurface(s,w.rect)
+				except:
+					# Not inside this container, so paint() skips it too
+					continue
 				#if (hasattr(w, "_container_bkgr")):
 				#    sub.blit(w._container_bkgr,(0,0))
+				app = pguglobals.app
+				if app and app.dirty_rects and not w.background:
+					# The widget is painted over its previous state, so
+					# clear it first to avoid smearing transparent pixels.
+					sub.fill(app.backdrop)
 				w.paint(sub)
 				updates.append(pygame.rect.Rect(w.rect))
 		
@@ -40,7 +99,11 @@ class Container(widget.Widget):
 			if w is self.mywindow:
 				continue
 			else:            
-				us = w.update(surface.subsurface(s,w.rect))
+				try:
+					sub = surface.subsurface(s,w.rect)
+				except:
+					continue
+				us = w.update(sub)
 			if us:
 				for u in us:
 					updates.append(pygame.rect.Rect(u.x + w.rect.x,u.y+w.rect.y,u.w,u.h))
@@ -109,6 +172,9 @@ class Container(widget.Widget):
 	
 	def event(self,e):
 		used = False
+		sub = self._sub
+		if sub is None:
+			sub = self._sub = events.TranslatedEvent()
 		
 		if self.mywindow and e.type == MOUSEBUTTONDOWN:
 			w = self.mywindow
@@ -130,7 +196,7 @@ class Container(widget.Widget):
 				if self.myfocus: self.blur(self.myfocus)
 			elif e.type == MOUSEBUTTONDOWN:
 				h = None
-				for w in self.widgets:
+				for w in self._hits(e.pos):
 					if not w.disabled: 
 						# Focusable not considered, since that is only for tabs
 						if w.collidepoint(e.pos):
@@ -142,7 +208,7 @@ class Container(widget.Widget):
 				if 1 in e.buttons:
 					if self.myfocus: ws = [self.myfocus]
 					else: ws = []
-				else: ws = self.widgets
+				else: ws = self._hits(e.pos)
 				
 				h = None
 				for w in ws:
@@ -156,37 +222,26 @@ class Container(widget.Widget):
 				w = self.myhover
 				
 				if w and w is not self.myfocus:
-					sub = pygame.event.Event(e.type,{
-						'buttons':e.buttons,
-						'pos':(e.pos[0]-w.rect.x,e.pos[1]-w.rect.y),
-						'rel':e.rel})
-					used = w._event(sub)
+					used = w._event(sub.translate(e,w.rect.x,w.rect.y))
 		
 		w = self.myfocus
 		if w:
 			if e.type == MOUSEBUTTONUP or e.type == MOUSEBUTTONDOWN:
-				sub = pygame.event.Event(e.type,{
-					'button':e.button,
-					'pos':(e.pos[0]-w.rect.x,e.pos[1]-w.rect.y)})
+				ev = sub.translate(e,w.rect.x,w.rect.y)
 			elif e.type == CLICK and self.myhover is w:
-				sub = pygame.event.Event(e.type,{
-					'button':e.button,
-					'pos':(e.pos[0]-w.rect.x,e.pos[1]-w.rect.y)})
+				ev = sub.translate(e,w.rect.x,w.rect.y)
 			elif e.type == MOUSEMOTION:
-				sub = pygame.event.Event(e.type,{
-					'buttons':e.buttons,
-					'pos':(e.pos[0]-w.rect.x,e.pos[1]-w.rect.y),
-					'rel':e.rel})
+				ev = sub.translate(e,w.rect.x,w.rect.y)
 			elif (e.type == KEYDOWN or e.type == KEYUP):
-				sub = e
+				ev = e
 			else:
-				sub = None
+				ev = None
 
 			#elif e.type == CLICK: #a dead click
 			#    sub = None
 
-			if (sub):
-				used = w._event(sub)
+			if (ev):
+				used = w._event(ev)
 
 		if not used and e.type is KEYDOWN:
 			if e.key is K_TAB and self.myfocus:
@@ -257,6 +312,7 @@ class Container(widget.Widget):
 		"""Remove a widget from the container."""
 		self.blur(w)
 		self.widgets.remove(w)
+		self._index = None
 		#self.repaint()
 		self.chsize()
 	
@@ -272,6 +328,7 @@ class Container(widget.Widget):
 		#w.rect.x,w.rect.y = w.style.x,w.style.y
 		#w.rect.w, w.rect.h = w.resize()
 		self.widgets.append(w)
+		self._index = None
 		self.chsize()
 	
 	def open(self,w=None,x=None,y=None):
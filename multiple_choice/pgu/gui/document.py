@@ -1,8 +1,9 @@
 """
 """
+import weakref
 import pygame
 
-from . import container
+from . import container, widget
 from . import layout
 
 class _document_widget:
@@ -10,8 +11,111 @@ class _document_widget:
 		#w.rect.w,w.rect.h = w.resize()
 		#self.rect = w.rect
 		self.widget = w
+		self.rect = pygame.Rect(0,0,0,0)
 		if align != None: self.align = align
 
+# The sizes of words, hashed by font and then by font style and word. The
+# sizes are forgotten together with the font.
+_word_sizes = weakref.WeakKeyDictionary()
+
+def _measure(font,style,words):
+	# Returns the sizes of words, measuring only the words that haven't been
+	# measured in this font and style before
+	try:
+		sizes = _word_sizes[font]
+	except KeyError:
+		sizes = _word_sizes[font] = {}
+	r = []
+	for word in words:
+		try:
+			size = sizes[style,word]
+		except KeyError:
+			size = sizes[style,word] = font.size(word)
+		r.append(size)
+	return r
+
+class TextRun(widget.Widget):
+	"""A run of words in the same font and color, which the document layout
+	breaks across lines. The words on each line are painted as one surface,
+	so that a paragraph is a single widget instead of a widget per word.
+	
+	Example:
+		doc = Document()
+		doc.add(TextRun("The quick brown fox".split(" "), font, (0,0,0)))
+
+	"""
+	
+	def __init__(self,words,font,color,**params):
+		params.setdefault('focusable',False)
+		params['decorate'] = False
+		widget.Widget.__init__(self,**params)
+		self.words = words
+		self.font = font
+		self.color = color
+		# The font may be restyled later, as the html parser does with <b>
+		# and <i>, so its current style is kept for painting
+		self.font_style = font.get_bold(),font.get_italic(),font.get_underline()
+		sizes = _measure(font,self.font_style,words)
+		self.widths = [size[0] for size in sizes]
+		# The height of a word depends on its glyphs
+		self.heights = [size[1] for size in sizes]
+		self.space,self.height = font.size(" ")
+		# The fragments (set by the layout) and their surfaces, hashed by
+		# the range of words
+		self.fragments = []
+		self._surfaces = {}
+	
+	def fit(self):
+		"""Set the rect to the bounding box of the fragments."""
+		if self.fragments:
+			r = self.fragments[0].rect
+			self.rect = r.unionall([f.rect for f in self.fragments[1:]])
+		else:
+			self.rect = pygame.Rect(0,0,0,0)
+	
+	def resize(self,width=None,height=None):
+		return self.rect.w,self.rect.h
+	
+	def collidepoint(self,pos):
+		# Only the fragments are hit, because their bounding box may overlap 
+		# other widgets
+		for f in self.fragments:
+			if f.rect.collidepoint(pos):
+				return True
+		return False
+	
+	def paint(self,s):
+		font = self.font
+		style = font.get_bold(),font.get_italic(),font.get_underline()
+		font.set_bold(self.font_style[0])
+		font.set_italic(self.font_style[1])
+		font.set_underline(self.font_style[2])
+		try:
+			surfaces = {}
+			for f in self.fragments:
+				img = self._surfaces.get((f.i,f.j))
+				if img == None:
+					img = self._render(f)
+				surfaces[f.i,f.j] = img
+				s.blit(img,(f.rect.x-self.rect.x,f.rect.y-self.rect.y))
+			self._surfaces = surfaces
+		finally:
+			font.set_bold(style[0])
+			font.set_italic(style[1])
+			font.set_underline(style[2])
+
+	def _render(self,f):
+		# Renders the words of a fragment one by one, at the positions that
+		# the layout gave them, so that the surface is exactly as wide as the
+		# fragment
+		img = pygame.Surface((max(1,f.rect.w),max(1,f.rect.h)),pygame.SRCALPHA,32)
+		img.fill((0,0,0,0))
+		x = 0
+		for i in range(f.i,f.j):
+			img.blit(self.font.render(self.words[i],1,self.color),(x,0))
+			x += self.widths[i]+self.space
+		return img
+
 class Document(container.Container):
 	"""A document is a container that structures widgets in a left-to-right flow."""
 
@@ -28,7 +132,11 @@ class Document(container.Container):
 			align -- alignment (None,-1,0,1)
 
 		"""
-		dw = _document_widget(e,align)
+		if isinstance(e,TextRun):
+			# A text run is laid out by the layout itself
+			dw = e
+		else:
+			dw = _document_widget(e,align)
 		self.layout.add(dw)
 		e.container = self
 		e._c_dw = dw
@@ -36,7 +144,7 @@ class Document(container.Container):
 		self.chsize()
 		
 	def remove(self,e):
-		self.layout._widgets.remove(e._c_dw)
+		self.layout.remove(e._c_dw)
 		self.widgets.remove(e)
 		self.chsize()
 		
@@ -44,27 +152,34 @@ class Document(container.Container):
 	def block(self,align):
 		"""Start a new block given the alignment (-1, 0, 1)"""
 		self.layout.add(align)
+		self.chsize()
 	
 	def space(self, size):
 		"""Add a spacer given the size."""
 		self.layout.add(size)
+		self.chsize()
 	
 	def br(self,height):
 		"""Add a line break, given the height."""
 		self.layout.add((0, height))
+		self.chsize()
 	
 	def resize(self,width=None,height=None):
 		if self.style.width: width = self.style.width
 		if self.style.height: height = self.style.height
 		
 		for w in self.widgets:
+			if w._c_dw is w:
+				continue
 			w.rect.w,w.rect.h = w.resize()
 			
 			if (width != None and w.rect.w > width) or (height != None and w.rect.h > height):
 				w.rect.w,w.rect.h = w.resize(width,height)
 			
+			# The layout keeps the positions of the elements that have the
+			# same size as before
 			dw = w._c_dw
-			dw.rect = pygame.Rect(0,0,w.rect.w,w.rect.h)
+			dw.rect.w,dw.rect.h = w.rect.w,w.rect.h
 		
 		if width == None: width = 65535
 		self.layout.rect = pygame.Rect(0,0,width,0)
@@ -75,6 +190,8 @@ class Document(container.Container):
 		for w in self.widgets:
 			#xt,xl,xb,xr = w.getspacing()
 			dw = w._c_dw
+			if dw is w:
+				w.fit()
 			w.style.x,w.style.y,w.rect.w,w.rect.h = dw.rect.x,dw.rect.y,dw.rect.w,dw.rect.h
 			#w.resize()
 			w.rect.x,w.rect.y = w.style.x,w.style.y
@@ -0,0 +1,41 @@
+"""A light-weight representation of mouse events that have been translated
+into the coordinates of a child widget."""
+
+class TranslatedEvent(object):
+	"""A mouse event, with its position relative to a child widget.
+
+	When a mouse event is routed down the widget tree, its position is
+	shifted into the coordinates of each widget that it passes. Instead of
+	creating a new pygame event at every level, every router (a container, a
+	theme decoration, the application) owns a single TranslatedEvent, which
+	is updated in place for each event that passes through it. This only
+	allocates the new position tuple.
+
+	Since the object is reused, widgets and callbacks should not keep a 
+	reference to an event after handling it, but copy the attributes that 
+	they need instead.
+
+	"""
+
+	__slots__ = ('type', 'pos', 'rel', 'buttons', 'button')
+
+	def __init__(self):
+		self.type = None
+		self.pos = None
+		self.rel = None
+		self.buttons = None
+		self.button = None
+
+	def translate(self, e, dx, dy):
+		"""Update this event to be a copy of the mouse event e, with its
+		position moved by (-dx, -dy). Returns the event itself."""
+		self.type = e.type
+		x, y = e.pos
+		self.pos = (x-dx, y-dy)
+		self.rel = getattr(e, 'rel', None)
+		self.buttons = getattr(e, 'buttons', None)
+		self.button = getattr(e, 'button', None)
+		return self
+
+	def __repr__(self):
+		return '<TranslatedEvent(%s, pos=%s)>' % (self.type, self.pos)
@@ -1,12 +1,49 @@
 """Document layout engine."""
 
+import bisect
+import pygame
+
+# The kinds of document elements (see Layout.add)
+_SPACE, _BR, _BLOCK, _RUN, _ALIGN, _ITEM = range(6)
+
+class Fragment:
+	"""The part of a text run that is on a single line: the words [i:j] of
+	the run."""
+	
+	def __init__(self,run,i,w,h):
+		self.run = run
+		self.i,self.j = i,i+1
+		self.rect = pygame.Rect(0,0,w,h)
+
 class Layout:
-	"""The document layout engine."""
+	"""The document layout engine.
+	
+	The layout keeps the state of the engine at the start of every line (the
+	line boxes) and the size of every element when it was laid out, so that
+	resize() only needs to lay out the document from the line of the first
+	element that was added, removed or resized. If nothing changed, resize()
+	does nothing.
+	
+	"""
 	
 	def __init__(self,rect=None):
 		"""initialize the object with the size of the box."""
 		self._widgets = []
 		self.rect = rect
+		self.widgets = []
+		# The kind of every element, and the size of every element when it was
+		# last laid out
+		self._kinds = []
+		self._sizes = []
+		# The line boxes: the index of the first element of every line, and
+		# the state of the engine before it
+		self._starts = []
+		self._states = []
+		# The first element that was added or removed since the last resize()
+		# (None if there is none), the box that was laid out and its height
+		self._changed = 0
+		self._box = None
+		self._height = 0
 		
 	def add(self,e): 
 		"""Add a document element to the layout.
@@ -18,11 +55,44 @@ class Layout:
 			that are aligned either left,center, or right.
 		* an object with a .rect (for size) -- such as a word element
 		* an object with a .rect (for size) and .align -- such as an image element
+		* an object with .widths, .heights, .space and .height -- a text 
+			run, that is the sizes of a series of words that are separated by
+			spaces of the given size. The run is broken into Fragments, one for 
+			every line, which are stored in .fragments.
 
 		"""
 		
+		if type(e) is tuple and e[0] != 0: kind = _SPACE
+		elif type(e) is tuple: kind = _BR
+		elif type(e) is int: kind = _BLOCK
+		elif hasattr(e,'widths'): kind = _RUN
+		elif hasattr(e,'align'): kind = _ALIGN
+		else: kind = _ITEM
 		self._widgets.append(e)
+		self._kinds.append(kind)
+		self._sizes.append(None)
+		self._touch(len(self._widgets)-1)
+		
+	def remove(self,e):
+		"""Remove a document element from the layout."""
+		self._delete(self._widgets.index(e))
+		
+	def pop(self):
+		"""Remove the last document element from the layout, and return it."""
+		e = self._widgets[-1]
+		self._delete(len(self._widgets)-1)
+		return e
 		
+	def _delete(self,i):
+		del self._widgets[i]
+		del self._kinds[i]
+		del self._sizes[i]
+		self._touch(i)
+		
+	def _touch(self,i):
+		# Element i and the elements after it need to be laid out again
+		if self._changed == None or i < self._changed:
+			self._changed = i
 		
 	def resize(self):
 		"""Resize the layout.
@@ -32,21 +102,64 @@ class Layout:
 		all objects.
 
 		"""
-		self.init()
-		self.widgets = []
-		for e in self._widgets:
-			if type(e) is tuple and e[0] != 0:
+		elements,kinds,sizes = self._widgets,self._kinds,self._sizes
+		n = len(elements)
+		box = self.rect.x,self.rect.y,self.rect.w
+		start = self._changed
+		if box != self._box:
+			start = 0
+		else:
+			# Find the first element that has been resized
+			for i in range(n if start == None else start):
+				if kinds[i] >= _ALIGN and sizes[i] != elements[i].rect.size:
+					start = i
+					break
+		if start == None:
+			self.rect.h = self._height
+			return
+		
+		# Continue from the start of the line of the first changed element
+		j = bisect.bisect_right(self._starts,start)-1
+		if start == 0 or j < 0:
+			j = 0
+			self.init()
+			self.widgets = []
+		else:
+			(self.x,self.y,self.left,self.right,self.left_bottom,
+				self.right_bottom,self.h,self.align,nw) = self._states[j]
+			self.items = []
+			del self.widgets[nw:]
+			start = self._starts[j]
+		del self._starts[j:]
+		del self._states[j:]
+		
+		for i in range(start,n):
+			e = elements[i]
+			if not self.items:
+				self._starts.append(i)
+				self._states.append((self.x,self.y,self.left,self.right,
+					self.left_bottom,self.right_bottom,self.h,self.align,
+					len(self.widgets)))
+			kind = kinds[i]
+			if kind == _ITEM:
+				sizes[i] = e.rect.size
+				self.do_item(e)
+			elif kind == _SPACE:
 				self.do_space(e)
-			elif type(e) is tuple and e[0] == 0:
+			elif kind == _BR:
 				self.do_br(e[1])
-			elif type(e) is int:
+			elif kind == _BLOCK:
 				self.do_block(align=e)
-			elif hasattr(e,'align'):
-				self.do_align(e)
+			elif kind == _RUN:
+				self.do_run(e)
 			else:
-				self.do_item(e)
+				sizes[i] = e.rect.size
+				self.do_align(e)
 		self.line()
 		self.rect.h = max(self.y,self.left_bottom,self.right_bottom)
+		self._height = self.rect.h
+		self._box = box
+		self._changed = None
 			
 	def init(self):
 		self.x,self.y = self.rect.x,self.rect.y
@@ -137,6 +250,39 @@ class Layout:
 		self.h = max(self.h,h)
 		self.x += w
 	
+	def do_run(self,e):
+		# This lays out the words as if every word was an item followed by a 
+		# space, but the words on the same line are joined into one Fragment
+		e.fragments = []
+		space = e.space
+		frag = None
+		for i,w in enumerate(e.widths):
+			h = e.heights[i]
+			if self.x+w >= self.getright(): 
+				self.line()
+				frag = None
+			if frag == None:
+				frag = Fragment(e,i,w,h)
+				e.fragments.append(frag)
+				self.items.append(frag)
+			else:
+				# Replace the space after the fragment by the space and the 
+				# word
+				self.items.pop()
+				frag.j = i+1
+				frag.rect.w += space+w
+				frag.rect.h = max(frag.rect.h,h)
+			self.h = max(self.h,h)
+			self.x += w
+			
+			if self.x+space >= self.getright():
+				self.line()
+				frag = None
+			else:
+				self.items.append((space,e.height))
+				self.h = max(self.h,e.height)
+				self.x += space
+	
 	def line(self):
 		x1 = self.getleft()
 		x2 = self.getright()
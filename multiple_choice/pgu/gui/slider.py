@@ -248,6 +248,16 @@ class HScrollBar(table.Table):
 	@step.setter
 	def step(self, value):
 		self.slider.step = value
+
+	@property
+	def size(self):
+		return self._size
+
+	@size.setter
+	def size(self, value):
+		# The length of the bar is passed on to the slider by resize()
+		self._size = value
+		self.chsize()
 		
 #    def __setattr__(self,k,v):
 #        if k in ('min','max','value','step'):
@@ -322,6 +332,9 @@ class VScrollBar(table.Table):
 		if k in ('min','max','value','step'):
 			return setattr(self.slider,k,v)
 		self.__dict__[k]=v
+		if k == 'size':
+			# The length of the bar is passed on to the slider by resize()
+			self.chsize()
 			
 	def __getattr__(self,k):
 		if k in ('min','max','value','step'):
@@ -10,13 +10,24 @@ class Style:
 	as opposed to widget.style['attr'].  It automatically grabs information 
 	from the theme via value = theme.get(widget.cls,widget.pcls,attr)
 
+	Values from the theme are resolved once per (cls, pcls, attr), and then 
+	read from the theme's table of resolved values (Theme.lookups), which is 
+	shared by all Style objects. Since the table is looked up with the current
+	cls and pcls, a widget that changes its pcls simply reads another entry.
+
 	"""
 	def __init__(self, obj, dict):
 		self.obj = obj
 		for k,v in dict.items(): self.__dict__[k]=v
 
 	def __getattr__(self, attr):
-		value = pguglobals.app.theme.get(self.obj.cls, self.obj.pcls, attr)
+		obj = self.obj
+		theme = pguglobals.app.theme
+		try:
+			value = theme.lookups[obj.cls, obj.pcls, attr]
+		except (KeyError, AttributeError):
+			# Not resolved yet, or a custom theme without a lookup table
+			value = theme.get(obj.cls, obj.pcls, attr)
 
 		if attr in (
 			'border_top','border_right','border_bottom','border_left',
@@ -26,6 +26,7 @@ class TextArea(widget.Widget):
 		self.vscroll = 0                # The number of lines that the TextArea is currently scrolled
 		self.font = self.style.font        # The font used for rendering the text
 		self.cursor_w = 2                 # Cursor width (NOTE: should be in a style)
+		self._rendered = {}               # The rendered lines, hashed by text and color
 		w,h = self.font.size("e"*size)    
 		if not self.style.height: self.style.height = h
 		if not self.style.width: self.style.width = w
@@ -57,13 +58,21 @@ class TextArea(widget.Widget):
 		elif ((self.vpos - self.vscroll + 1) * self.line_h > self.rect.h):
 			self.vscroll = - (self.rect.h / self.line_h - self.vpos - 1)
 
-		# Blit each of the lines in turn
+		# Blit each of the lines in turn. Only the lines that have changed
+		# since the last paint are rendered again.
+		rendered = {}
 		cnt = 0
 		for line in self.lines:
 			line_pos = (0, (cnt - self.vscroll) * self.line_h)
 			if (line_pos[1] >= 0) and (line_pos[1] < self.rect.h):
-				s.blit( self.font.render(line, 1, self.style.color), line_pos )
+				key = (line, tuple(self.style.color))
+				img = self._rendered.get(key)
+				if img == None:
+					img = self.font.render(line, 1, self.style.color)
+				rendered[key] = img
+				s.blit( img, line_pos )
 			cnt += 1
+		self._rendered = rendered
 		
 		# If the textarea is focused, then also show the cursor
 		if self.container.myfocus is self:
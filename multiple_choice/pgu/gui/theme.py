@@ -2,12 +2,14 @@
 
 """
 """
-import os, re
+import os, re, warnings
 import pygame
 
 from .const import *
 from . import widget
 from . import surface
+from . import events
+from . import pguglobals
 from .basic import parse_color, is_color
 
 __file__ = os.path.abspath(__file__)
@@ -19,6 +21,36 @@ def _list_themes(dir):
 			d[entry] = os.path.join(dir, entry)
 	return d
 
+# The themes that have been loaded so far, hashed by their theme dirs. These are
+# shared by all applications within the same scope (see shared_theme).
+_themes = {}
+_themes_scope = None
+
+def shared_theme(dirs='default', scope=None):
+	"""Returns a Theme for the given theme dirs, which is only loaded (config 
+	parsed, images decoded and fonts constructed) the first time it is needed, 
+	and then shared by every caller that asks for the same dirs.
+
+	Keyword arguments:
+		dirs -- the theme dirs, as passed to Theme
+		scope -- the object that the cached themes belong to, typically the
+			experiment. Asking for a theme with a different scope discards 
+			all cached themes, because their fonts and images may not survive 
+			a re-initialization of pygame. None shares the current themes.
+
+	"""
+	global _themes_scope
+	if scope != None and scope is not _themes_scope:
+		_themes.clear()
+		_themes_scope = scope
+	if isinstance(dirs, list):
+		key = tuple(dirs)
+	else:
+		key = (dirs,)
+	if key not in _themes:
+		_themes[key] = Theme(dirs)
+	return _themes[key]
+
 class Theme:
 	"""Theme interface.
 	
@@ -43,6 +75,16 @@ class Theme:
 		self.config = {}
 		self._loaded = []
 		self.cache = {}
+		# The resolved style values (the results of get(), including 
+		# fallbacks and misses), hashed by (cls, pcls, attr). Style objects
+		# read this table directly (see style.Style). The number of values
+		# that had to be resolved is counted, but hits are not, to keep that
+		# path as short as possible.
+		self.lookups = {}
+		self.misses = 0
+		# The cache keys of the images that have been converted to the display
+		# format by preload()
+		self._converted = set()
 		self._preload(dirs)
 		pygame.font.init()
 	
@@ -52,6 +94,8 @@ class Theme:
 		for d in ds:
 			if d not in self._loaded:
 				self._load(d)
+				# The new config may change the resolved values
+				self.lookups.clear()
 			self._loaded.append(d)
 	
 	def _load(self, name):
@@ -165,27 +209,96 @@ class Theme:
 			self._preload("default")
 
 		o = (cls, pcls, attr)
-		
-		#if o in self.cache: 
-		#    return self.cache[o]
+		try:
+			return self.lookups[o]
+		except KeyError:
+			pass
+		self.misses += 1
 
+		# Try the pseudo class, the class and the default, in that order
 		v = self._get(cls, pcls, attr)
-		if v: 
-			#self.cache[o] = v
-			return v
-		
-		v = self._get(cls, "", attr)
-		if v: 
-			#self.cache[o] = v
-			return v
-		
-		v = self._get("default", "", attr)
-		if v: 
-			#self.cache[o] = v
-			return v
+		if not v:
+			v = self._get(cls, "", attr)
+		if not v:
+			v = self._get("default", "", attr)
+		if not v:
+			v = 0
+		self.lookups[o] = v
+		return v
+
+	def preload(self, classes=None, pseudo_classes=('', 'hover', 'down', 'focus')):
+		"""Resolve every style value that widgets of the given classes can
+		need, and load the images and fonts that they refer to, so that this 
+		doesn't happen the first time that a widget is painted. If there is a
+		display, images are also converted to its pixel format.
+
+		Keyword arguments:
+			classes -- a list of widget classes, such as "button". Sub-classes,
+				such as "button.label", are included. None preloads every class.
+			pseudo_classes -- the pseudo classes that the widgets can be in
 		
-		self.cache[o] = 0
-		return 0
+		Example:
+			theme.preload(["button", "radio"])
+
+		"""
+		if not self._loaded: 
+			# Load the default theme
+			self._preload("default")
+
+		def match(cls):
+			if cls == "default" or classes == None:
+				return True
+			for c in classes:
+				if cls == c or cls.startswith(c+"."):
+					return True
+			return False
+
+		# Decode all images and fonts
+		attrs = {}
+		for (cls, pcls, attr) in list(self.config.keys()):
+			if not match(cls):
+				continue
+			attrs.setdefault(cls, set()).add(attr)
+			if pcls in pseudo_classes:
+				try:
+					self._get(cls, pcls, attr)
+				except (pygame.error, IOError, OSError):
+					# The theme refers to a file that it doesn't have. This 
+					# only fails when a widget actually uses the file.
+					warnings.warn('could not preload %s' % ' '.join(self.config[cls, pcls, attr][1]))
+
+		# Convert the images, after which the lookups that refer to the
+		# original images are stale
+		if pygame.display.get_surface() != None:
+			converted = False
+			for key, v in list(self.cache.items()):
+				if not isinstance(v, pygame.Surface) or key in self._converted:
+					continue
+				if v.get_flags() & pygame.SRCALPHA:
+					self.cache[key] = v.convert_alpha()
+				else:
+					self.cache[key] = v.convert()
+				self._converted.add(key)
+				converted = True
+			if converted:
+				self.lookups.clear()
+
+		# Resolve the values, including fallbacks to the class and default
+		default = attrs.get("default", set())
+		for cls in attrs:
+			for pcls in pseudo_classes:
+				for attr in attrs[cls] | default:
+					try:
+						self.get(cls, pcls, attr)
+					except (pygame.error, IOError, OSError):
+						# A missing file, which has been warned about above
+						pass
+
+	def cache_info(self):
+		"""Returns the number of style values that had to be resolved 
+		(misses) and the number of resolved values that are kept, as a 
+		(misses, size) tuple."""
+		return self.misses, len(self.lookups)
 
 	def box(self,w,s):
 		style = w.style
@@ -220,7 +333,7 @@ class Theme:
 							   rect.w + left + right, 
 							   rect.h + top + bottom)
 
-		def func(width=None,height=None):
+		def layout(width,height):
 			s = w.style
 			
 			pt,pr,pb,pl = (s.padding_top,s.padding_right,
@@ -269,8 +382,39 @@ class Theme:
 			w._rect_content = rect
 
 			return (w._rect_margin.w, w._rect_margin.h)
-		return func
 
+		def func(width=None,height=None):
+			# The layout of a widget only depends on the arguments and on the
+			# size in its style, until the widget or one of its children calls
+			# chsize(). Until then the sizes are taken from w._layout.
+			s = w.style
+			key = width,height,s.width,s.height
+			# The state of the layout pass is kept by the app, because the
+			# theme may be shared by several apps
+			app = pguglobals.app
+			w._layout_want = key
+			sizes = w._layout
+			if sizes != None and key in sizes:
+				size = sizes[key]
+				if key != w._layout_key:
+					# The widget currently has the layout for other arguments,
+					# so it is laid out again if these are the final ones
+					app._unrealized.append(w)
+			else:
+				app._layout_depth += 1
+				try:
+					size = layout(width,height)
+				finally:
+					app._layout_depth -= 1
+				# The layout may have invalidated itself by calling chsize()
+				if w._layout == None or len(w._layout) >= 8:
+					w._layout = {}
+				w._layout[key] = size
+				w._layout_key = key
+			if not app._layout_depth and app._unrealized:
+				app.realize()
+			return size
+		return func
 
 	def paint(self,w,m):
 		def func(s):
@@ -319,6 +463,8 @@ class Theme:
 		return func
 	
 	def event(self,w,m):
+		# The event that is reused to pass mouse events on to the widget
+		sub = events.TranslatedEvent()
 		def func(e):
 			rect = w._rect_content
 			if (not rect):
@@ -326,22 +472,10 @@ class Theme:
 				# set before a mouse event is received. In this case we'll ignore the event.
 				return m(e)
 
-			if e.type == MOUSEBUTTONUP or e.type == MOUSEBUTTONDOWN:
-				sub = pygame.event.Event(e.type,{
-					'button':e.button,
-					'pos':(e.pos[0]-rect.x,e.pos[1]-rect.y)})
-			elif e.type == CLICK:
-				sub = pygame.event.Event(e.type,{
-					'button':e.button,
-					'pos':(e.pos[0]-rect.x,e.pos[1]-rect.y)})
-			elif e.type == MOUSEMOTION:
-				sub = pygame.event.Event(e.type,{
-					'buttons':e.buttons,
-					'pos':(e.pos[0]-rect.x,e.pos[1]-rect.y),
-					'rel':e.rel})
-			else:
-				sub = e
-			return m(sub)
+			if e.type == MOUSEBUTTONUP or e.type == MOUSEBUTTONDOWN or \
+				e.type == CLICK or e.type == MOUSEMOTION:
+				return m(sub.translate(e,rect.x,rect.y))
+			return m(e)
 
 		return func
 	
@@ -0,0 +1,122 @@
+"""Per-frame timing instrumentation for the application loop."""
+
+import array
+from timeit import default_timer
+
+# The phases of a frame, in the order in which they are stored
+PUMP = 0
+DISPATCH = 1
+PAINT = 2
+CURSOR = 3
+FLIP = 4
+
+class FrameTimer:
+	"""Records the time spent in each phase of a frame into a preallocated
+	ring buffer, which holds the most recent 'size' frames.
+
+	A timer is attached to an application with App.instrument, which wraps
+	the App methods that make up a frame. An application that isn't
+	instrumented doesn't pay anything for this.
+
+	Example:
+		timer = app.instrument()
+		app.run()
+		print timer.summary()
+
+	"""
+
+	# The names of the phases, indexed by the constants above
+	phases = ('pump', 'dispatch', 'paint', 'cursor', 'flip')
+
+	def __init__(self, size=1024, budget=1./60):
+		"""Create a new timer.
+
+		Keyword arguments:
+			size -- the number of frames that are kept
+			budget -- the duration of a frame (in seconds). Frames that take
+				longer than this are counted as dropped.
+
+		"""
+		self.size = size
+		self.budget = budget
+		self.clock = default_timer
+		n = len(self.phases)
+		self._data = array.array('d', [0.]*(size*n))
+		self._current = [0.]*n
+		# The total number of frames recorded, which may exceed 'size'
+		self.frames = 0
+		# The number of frames that exceeded the budget
+		self.dropped = 0
+
+	def wrap(self, phase, m):
+		"""Returns a function that calls m and adds its duration to the given
+		phase of the current frame."""
+		clock = self.clock
+		current = self._current
+		def func(*args):
+			t = clock()
+			r = m(*args)
+			current[phase] += clock()-t
+			return r
+		return func
+
+	def wrap_frame(self, m):
+		"""Returns a function that calls m and then ends the current frame."""
+		def func(*args):
+			r = m(*args)
+			self.end_frame()
+			return r
+		return func
+
+	def end_frame(self):
+		"""Stores the current frame in the ring buffer. Frames in which
+		nothing was timed are not stored."""
+		cur = self._current
+		total = sum(cur)
+		if not total:
+			return
+		n = len(cur)
+		i = (self.frames % self.size)*n
+		for j in range(n):
+			self._data[i+j] = cur[j]
+			cur[j] = 0.
+		if total > self.budget:
+			self.dropped += 1
+		self.frames += 1
+
+	def _durations(self, phase=None):
+		# Returns the stored durations of a phase (or the frame totals if
+		# phase is None), in milliseconds
+		n = len(self.phases)
+		count = min(self.frames, self.size)
+		if phase != None:
+			return [1000.*self._data[i*n+phase] for i in range(count)]
+		return [1000.*sum(self._data[i*n:(i+1)*n]) for i in range(count)]
+
+	def summary(self):
+		"""Returns a dict with the mean, 95th percentile and maximum duration
+		(in milliseconds) of each phase and of the frame as a whole, over the
+		frames in the ring buffer. Also includes the total number of frames
+		and dropped frames."""
+		stats = {'frames': self.frames, 'dropped': self.dropped}
+		for name, phase in list(zip(self.phases, range(len(self.phases)))) + \
+			[('total', None)]:
+			v = sorted(self._durations(phase))
+			if not v:
+				stats[name] = (0., 0., 0.)
+				continue
+			p95 = v[min(len(v)-1, int(.95*len(v)))]
+			stats[name] = (sum(v)/len(v), p95, v[-1])
+		return stats
+
+	def log(self, experiment, prefix='frame'):
+		"""Stores the summary as experiment variables, such as
+		[prefix]_paint_mean, [prefix]_total_p95 and [prefix]_dropped."""
+		stats = self.summary()
+		for name in self.phases + ('total',):
+			mean, p95, max_ = stats[name]
+			experiment.set('%s_%s_mean' % (prefix, name), mean)
+			experiment.set('%s_%s_p95' % (prefix, name), p95)
+			experiment.set('%s_%s_max' % (prefix, name), max_)
+		experiment.set('%s_frames' % prefix, stats['frames'])
+		experiment.set('%s_dropped' % prefix, stats['dropped'])
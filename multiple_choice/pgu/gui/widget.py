@@ -11,6 +11,11 @@ class SignalCallback:
 	func = None
 	# The parameters to pass to the function (as a list)
 	params = None
+	# The arguments to call the function with, resolved when the callback is
+	# connected. Each entry is either the index of a parameter, or the name of
+	# a magic argument (_event, _code or _widget). None means that the
+	# function takes no magic arguments, and is called with the parameters.
+	plan = None
 
 class Widget(object):
 	"""Base class for all PGU graphical objects.
@@ -47,6 +52,13 @@ class Widget(object):
 	_rect_content = None
 	# A dictionary of signal callbacks, hashed by signal ID
 	connects = None
+	# The sizes returned by resize(), hashed by the arguments and the style
+	# size, or None if the widget needs to be laid out again (see chsize)
+	_layout = None
+	# The key of the layout that the widget currently has, and the key of
+	# the last call to resize()
+	_layout_key = None
+	_layout_want = None
 	
 	def __init__(self, **params): 
 		"""Create a new Widget instance given the style parameters.
@@ -153,6 +165,17 @@ class Widget(object):
 	def chsize(self):
 		"""Signal that this widget has changed its size."""
 		
+		# Only this widget and its containers need to be laid out again. The
+		# layout of the other widgets is reused by the next App.resize().
+		w = self
+		while w != None:
+			w._layout = None
+			if w.container != None and w.container.relayout(w):
+				# The container has laid out the widget itself, so the
+				# application doesn't need to be laid out again
+				return
+			w = w.container
+		
 		if (not self._painted): 
 			return
 		
@@ -162,6 +185,16 @@ class Widget(object):
 		if (pguglobals.app):
 			pguglobals.app.chsize()
 
+	def relayout(self,w):
+		"""Lay out a child widget that has changed its size, without laying
+		out the rest of the application. Returns False if this widget can't 
+		do that, in which case the whole application is laid out again.
+
+		This may be implemented by a subclass.
+
+		"""
+		return False
+
 	def update(self,s):
 		"""Updates the surface and returns a rect list of updated areas
 
@@ -255,8 +288,45 @@ class Widget(object):
 		cb = SignalCallback()
 		cb.func = func
 		cb.params = params
+		cb.plan = self._plan(func, params)
 		self.connects[code].append(cb)
 
+	def _plan(self, func, params):
+		"""Resolves which arguments a callback function is called with, so
+		that send() doesn't have to introspect the function on every event."""
+		# Attempt to be compatible with previous versions of python
+		try:
+			fcode = func.__code__
+		except AttributeError:
+			fcode = getattr(func, 'func_code', None)
+		if fcode is None:
+			return None
+
+		nargs = fcode.co_argcount
+		names = list(fcode.co_varnames)[:nargs]
+
+		# If the function is bound to an instance, remove the first argument name. Again
+		# we keep compatibility with older versions of python.
+		if (hasattr(func, "__self__") and hasattr(func.__self__, "__class__") or 
+			hasattr(func,'im_class')): 
+			names = names[1:]
+
+		plan = []
+		n = 0
+		for name in names:
+			if name in ('_event', '_code', '_widget'):
+				plan.append(name)
+			elif n < len(params):
+				plan.append(n)
+				n += 1
+			else:
+				break
+		if n == len(plan):
+			# No magic arguments, so the parameters are passed as they are
+			return None
+		plan.extend(range(n, len(params)))
+		return plan
+
 	# Remove signal handlers from the given event code. If func is specified,
 	# only those handlers will be removed. If func is None, all handlers
 	# will be removed.
@@ -283,35 +353,19 @@ class Widget(object):
 			return
 		# Trigger all connected signal handlers
 		for cb in self.connects[code]:
-			func = cb.func
-			values = list(cb.params)
-
-			# Attempt to be compatible with previous versions of python
-			try:
-				code = func.__code__
-			except:
-				code = func.func_code
-
-			nargs = code.co_argcount
-			names = list(code.co_varnames)[:nargs]
-
-			# If the function is bound to an instance, remove the first argument name. Again
-			# we keep compatibility with older versions of python.
-			if (hasattr(func, "__self__") and hasattr(func.__self__, "__class__") or 
-				hasattr(func,'im_class')): 
-				names.pop(0)
-			
-			args = []
+			plan = cb.plan
+			if plan is None:
+				cb.func(*cb.params)
+				continue
+			params = cb.params
 			magic = {'_event':event,'_code':code,'_widget':self}
-			for name in names:
-				if name in magic.keys():
-					args.append(magic[name])
-				elif len(values):
-					args.append(values.pop(0))
+			args = []
+			for p in plan:
+				if p.__class__ is int:
+					args.append(params[p])
 				else:
-					break
-			args.extend(values)
-			func(*args)
+					args.append(magic[p])
+			cb.func(*args)
 	
 	def _event(self,e):
 		if self.disabled: return
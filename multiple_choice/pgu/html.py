@@ -118,7 +118,7 @@ class _html(HTMLParser):
         if len(self.item.layout._widgets) == 0: return 
         w = self.item.layout._widgets[-1]
         if type(w) == tuple:
-            del self.item.layout._widgets[-1]
+            self.item.layout.pop()
 
         
     def start_b(self,attrs): self.font.set_bold(1)
@@ -462,12 +462,10 @@ class _html(HTMLParser):
             self.item.space(self.font.size(" "))
             return
         
-        for word in txt.split(" "):
-            word = word.replace(chr(160)," ") #&nbsp;
-            #print self.item.cls
-            w = gui.Image(self.font.render(word,1,self.color))
-            self.item.add(w)
-            self.item.space(self.font.size(" "))
+        # The words are added as a single run, which the layout breaks
+        # across lines, as if every word was followed by a space
+        words = [word.replace(chr(160)," ") for word in txt.split(" ")] #&nbsp;
+        self.item.add(gui.TextRun(words,self.font,self.color))
             
 
 class HTML(gui.Document):
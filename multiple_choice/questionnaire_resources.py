@@ -0,0 +1,158 @@
+"""
+This file is part of opensesame.
+
+opensesame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+opensesame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with opensesame.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import pygame
+from collections import OrderedDict
+from pgu import gui, html
+from pgu.gui import pguglobals
+
+# The decoded images, hashed by resource name. These belong to a single
+# experiment, because they are converted to the pixel format of its display.
+_images = {}
+_images_experiment = None
+
+def software_display():
+
+	"""
+	Check whether the display keeps its contents between frames, so that only
+	the regions that change need to be updated (see gui.App.dirty_rects).
+	Hardware and double-buffered displays don't, and need to be redrawn
+	entirely on every frame.
+
+	Returns:
+	True or False
+	"""
+
+	surf = pygame.display.get_surface()
+	return surf != None and not surf.get_flags() & (pygame.HWSURFACE | pygame.DOUBLEBUF)
+
+def load_image(experiment, res):
+
+	"""
+	Load a plug-in resource as a pygame surface. Each resource is only decoded
+	(and converted to the display pixel format) once, and the same surface is
+	then returned to every plug-in instance that asks for it. The surfaces are
+	shared, so they should not be modified.
+
+	Arguments:
+	experiment -- the experiment
+	res -- the name of the resource
+
+	Returns:
+	A pygame surface
+	"""
+
+	global _images_experiment
+
+	if experiment is not _images_experiment:
+		_images.clear()
+		_images_experiment = experiment
+
+	if res not in _images:
+		surf = pygame.image.load(experiment.resource(res))
+		# Converting requires a display, which may not be there yet
+		if pygame.display.get_surface() != None:
+			if surf.get_flags() & pygame.SRCALPHA:
+				surf = surf.convert_alpha()
+			else:
+				surf = surf.convert()
+		_images[res] = surf
+	return _images[res]
+
+# The rendered questions, hashed by the content of the question, the font and
+# color of the labels, and the width, from the least to the most recently used.
+# Like the images, these belong to a single experiment.
+_documents = OrderedDict()
+_documents_experiment = None
+# The maximum number of rendered questions that are kept
+max_documents = 64
+# The number of questions that were (not) found among the rendered questions
+document_hits = 0
+document_misses = 0
+
+def question_document(experiment, text, width=None):
+
+	"""
+	Returns a widget that shows a question, with every line in a gui.Label,
+	as in a html.HTML document. A question is only laid out and rendered the
+	first time that it is shown, and the rendered question is reused when the
+	same question is shown again, for example in the next trial of a loop.
+
+	Arguments:
+	experiment -- the experiment
+	text -- the question, with lines separated by newlines
+
+	Keyword arguments:
+	width -- the width of the document (default = None, which means that the
+			 document is as wide as the longest line)
+
+	Returns:
+	A gui.Image
+	"""
+
+	global _documents_experiment, document_hits, document_misses
+
+	if experiment is not _documents_experiment:
+		_documents.clear()
+		_documents_experiment = experiment
+
+	theme = pguglobals.app.theme
+	font = theme.get("label", "", "font")
+	color = tuple(theme.get("label", "", "color"))
+	data = text
+	if not isinstance(data, bytes):
+		data = data.encode("utf-8")
+	key = hashlib.sha1(data).hexdigest(), font, color, width
+
+	surf = _documents.pop(key, None)
+	if surf != None:
+		document_hits += 1
+	else:
+		document_misses += 1
+		doc = html.HTML("")
+		for l in text.split("\n"):
+			doc.add(gui.Label(l))
+			doc.br(0)
+		w, h = doc.resize(width)
+		surf = pygame.Surface((max(1, w), max(1, h)), pygame.SRCALPHA, 32)
+		# Transparent, but in the color of the text, so that the edges of the
+		# anti-aliased text keep their color when the question is blitted
+		surf.fill(color[:3] + (0,))
+		doc.paint(surf)
+		if pygame.display.get_surface() != None:
+			surf = surf.convert_alpha()
+		while len(_documents) >= max_documents:
+			_documents.popitem(last=False)
+	# Move the question to the most recently used end
+	_documents[key] = surf
+	return gui.Image(surf)
+
+def document_cache_info():
+
+	"""
+	Returns statistics about the rendered questions
+
+	Returns:
+	A (hits, misses, size, hit rate) tuple
+	"""
+
+	n = document_hits + document_misses
+	if n == 0:
+		return document_hits, document_misses, len(_documents), 0.
+	return document_hits, document_misses, len(_documents), \
+		float(document_hits) / n
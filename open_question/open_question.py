@@ -26,7 +26,8 @@ from PyQt4 import QtGui, QtCore
 
 path = os.path.join(os.path.dirname(os.path.split(__file__)[0]), "multiple_choice")
 sys.path.append(path)
-from pgu import gui, html
+from pgu import gui
+import questionnaire_resources
 
 class open_question(item.item):
 
@@ -76,31 +77,31 @@ class open_question(item.item):
 		# Pass the word on to the parent
 		item.item.prepare(self)
 
-		#generic_response.generic_response.prepare(self)
-		return True
+		t0 = self.time()
 
-	def run(self):
+		# Create the app. On a software display, only the widgets that change
+		# are redrawn.
+		self.app = gui.Desktop(item=self, dirty_rects=questionnaire_resources.software_display())
+		self.app.connect(gui.QUIT, self.app.quit, None)
+		# Merge mouse motion, so that fast mouse movements don't pile up
+		self.app.coalesce_motion = True
 
-		"""Run the item"""
+		# Optionally record how long every frame takes
+		if self.has("frame_timing") and self.get("frame_timing") == "yes":
+			self.app.instrument()
 
-		# Initialize the item
-		self.set_item_onset()
-		self.sri = self.time()
-		self.experiment.set("response", None)
-		self.experiment.set("response_time", None)
-
-		# Create the app
-		self.app = gui.Desktop(item=self)
-		self.app.connect(gui.QUIT, self.app.quit, None)
+		# Load and convert all theme images and fonts that the widgets can
+		# need, so that this doesn't happen while the item is on screen
+		self.app.theme.preload(["desktop", "document", "label", "input", "button"])
 
 		pad = 0 # The maximum line length, used to pad the options
 
-		# Create an HTML document for the content
-		doc = html.HTML("")
-		for l in self.experiment.unsanitize(self.get("question")).split("\n"):
-			doc.add(gui.Label(l))
+		# Create an HTML document for the content. The rendered document is
+		# reused when the same question is shown again.
+		question = self.experiment.unsanitize(self.get("question"))
+		for l in question.split("\n"):
 			pad = max(pad, len(l))
-			doc.br(0)
+		doc = questionnaire_resources.question_document(self.experiment, question)
 
 		# Create a 2-column table, start with the HTML on the first row
 		c = gui.Table()
@@ -108,24 +109,47 @@ class open_question(item.item):
 		c.td(doc, align=-1)
 
 		c.tr()
-		t = gui.TextArea(width=self.get("text_area_width"), height=self.get("text_area_height"))
-		c.td(t, align=-1)
+		self.text_area = gui.TextArea(width=self.get("text_area_width"), height=self.get("text_area_height"))
+		c.td(self.text_area, align=-1)
 
 		c.tr()
 		e = gui.Button(self.get("accept_text"))
 		e.connect(gui.CLICK, self.app.quit, None)
 		c.td(e, align=-1, height=32, valign=1)
 
+		# Build and pre-render the first frame, so that run() only needs to
+		# show it
+		self.app.prepare(c)
+		self.experiment.set("prepare_time_%s" % self.name, self.time() - t0)
+
+		#generic_response.generic_response.prepare(self)
+		return True
+
+	def run(self):
+
+		"""Run the item"""
+
+		# Show the prepared form and initialize the item
+		self.app.show()
+		self.set_item_onset()
+		self.sri = self.time()
+		self.experiment.set("response", None)
+		self.experiment.set("response_time", None)
+
 		# Keep running the app until a response has been received
 		while True:
-			self.app.run(c)
-			if t.value.strip() != "" or self.get("allow_empty") == "yes":
+			self.app.run(event_driven=True)
+			if self.text_area.value.strip() != "" or self.get("allow_empty") == "yes":
 				break
 
 		# Set the response and response time
-		self.experiment.set("response", self.experiment.usanitize(unicode(QtCore.QString(t.value.strip()))))
+		self.experiment.set("response", self.experiment.usanitize(unicode(QtCore.QString(self.text_area.value.strip()))))
 		self.experiment.set("response_time", self.time() - self.sri)
 
+		# Log the frame timing statistics, if they have been recorded
+		if self.app.timer:
+			self.app.timer.log(self.experiment, "frame_%s" % self.name)
+
 		# Return success
 		return True
 
@@ -0,0 +1,340 @@
+"""
+This file is part of opensesame.
+
+opensesame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+opensesame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with opensesame.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+from libopensesame import item, exceptions
+from libqtopensesame import qtplugin
+import os.path
+import sys
+import re
+from PyQt4 import QtCore
+
+path = os.path.join(os.path.dirname(os.path.split(__file__)[0]), "multiple_choice")
+sys.path.append(path)
+from pgu import gui
+import questionnaire_resources
+
+class questionnaire_page(item.item):
+
+	"""Basic functionality of the plug-in"""
+
+	def __init__(self, name, experiment, string = None):
+
+		"""
+		Constructor
+
+		Arguments:
+		name -- name of the item
+		experiment -- the experiment
+
+		Keyword arguments:
+		string -- definitional string (default = None)
+		"""
+
+		global path
+
+		self.item_type = "questionnaire_page"
+		self.description = "Presents a page with multiple questions"
+
+		# One question per line, as type;variable;question;options, where type
+		# is 'choice' (options are the choices), 'rating' (the option is the
+		# maximum rating) or 'open' (no options). A semicolon in a question or
+		# option is written as '\;'.
+		self.questions = "choice;q1;Put your question here;Yes;Maybe;No\nrating;q2;Put your question here;5\nopen;q3;Put your question here"
+		self.accept_text = "Accept"
+		self.allow_empty = "no"
+		self.text_area_width = 400
+		self.text_area_height = 100
+
+		# Pass the word on to the parent
+		item.item.__init__(self, name, experiment, string)
+
+		rating_path = os.path.join(os.path.dirname(os.path.split(__file__)[0]), "rating_scale")
+		self.experiment.resources["rating_active.png"] = os.path.join(rating_path, "rating_active.png")
+		self.experiment.resources["rating_inactive.png"] = os.path.join(rating_path, "rating_inactive.png")
+
+		# These lines makes sure that the icons and help file are recognized by
+		# OpenSesame. Copy-paste these lines at the end of your plugin's constructor
+		self.experiment.resources["%s.png" % self.item_type] = os.path.join(os.path.split(__file__)[0], "%s.png" % self.item_type)
+		self.experiment.resources["%s_large.png" % self.item_type] = os.path.join(os.path.split(__file__)[0], "%s_large.png" % self.item_type)
+		self.experiment.resources["%s.html" % self.item_type] = os.path.join(path, "questionnaire_plugins.html")
+		self.experiment.resources["mouse_cursor.png"] = os.path.join(path, "mouse_cursor.png")
+
+	def parse_questions(self):
+
+		"""
+		Parse the question definitions. A semicolon in a question or option
+		is written as '\\;'.
+
+		Returns:
+		A list of (type, variable, question, options) tuples
+		"""
+
+		# The responses are stored as experiment variables, so they must not
+		# collide with each other, with the attributes of this item (which
+		# get() would return instead) or with the variables that are used by
+		# this item
+		reserved = set(self.__dict__) | set(["width", "height", "response", "response_time"])
+		variables = set()
+		questions = []
+		for l in self.experiment.unsanitize(self.get("questions")).split("\n"):
+			if l.strip() == "":
+				continue
+			fields = [f.replace("\\;", ";") for f in re.split(r"(?<!\\);", l)]
+			if len(fields) < 3 or fields[0] not in ("choice", "rating", "open"):
+				raise exceptions.runtime_error("Invalid question definition in %s: '%s'" % (self.name, l))
+			_type, var, question, options = fields[0], fields[1], fields[2], fields[3:]
+			if var.strip() == "":
+				raise exceptions.runtime_error("Missing variable name in %s: '%s'" % (self.name, l))
+			if re.match(r"^[A-Za-z_][A-Za-z0-9_]*$", var) == None:
+				raise exceptions.runtime_error("Invalid variable name '%s' in %s (use only letters, digits and underscores, and don't start with a digit): '%s'" % (var, self.name, l))
+			if var in reserved:
+				raise exceptions.runtime_error("The variable name '%s' in %s is reserved: '%s'" % (var, self.name, l))
+			if var in variables:
+				raise exceptions.runtime_error("The variable name '%s' is used more than once in %s: '%s'" % (var, self.name, l))
+			variables.add(var)
+			if _type == "choice" and (options == [] or "" in [o.strip() for o in options]):
+				raise exceptions.runtime_error("A choice question needs one or more non-empty options in %s: '%s'" % (self.name, l))
+			if _type == "rating" and (len(options) != 1 or not options[0].strip().isdigit() or int(options[0]) < 1):
+				raise exceptions.runtime_error("A rating question needs a single maximum rating of 1 or more in %s: '%s'" % (self.name, l))
+			if _type == "open" and options != []:
+				raise exceptions.runtime_error("An open question has no options in %s (use '\\;' for a semicolon in the question): '%s'" % (self.name, l))
+			questions.append((_type, var, question, options))
+		return questions
+
+	def prepare(self):
+
+		"""Prepare the item"""
+
+		if self.get("mouse_backend") != "legacy" or self.get("canvas_backend") != "legacy":
+			raise exceptions.runtime_error("Sorry, the questionnaire plug-ins only support the legacy back-end!")
+
+		# Pass the word on to the parent
+		item.item.prepare(self)
+
+		t0 = self.time()
+
+		# Create the app. On a software display, only the widgets that change
+		# are redrawn.
+		self.app = gui.Desktop(item=self, dirty_rects=questionnaire_resources.software_display())
+		self.app.connect(gui.QUIT, self.app.quit, None)
+		# Merge mouse motion, so that fast mouse movements don't pile up
+		self.app.coalesce_motion = True
+
+		# Optionally record how long every frame takes
+		if self.has("frame_timing") and self.get("frame_timing") == "yes":
+			self.app.instrument()
+
+		# Load and convert all theme images and fonts that the widgets can
+		# need, so that this doesn't happen while the item is on screen
+		self.app.theme.preload(["desktop", "document", "label", "radio", "input", "button", "scrollarea", "vscrollbar"])
+
+		inactive = questionnaire_resources.load_image(self.experiment, "rating_inactive.png")
+		# The active image is needed on the first click, so load it now rather
+		# than while the item is running
+		questionnaire_resources.load_image(self.experiment, "rating_active.png")
+
+		# All questions go into a single table, one question per row. The
+		# response widgets are kept, hashed by variable, so that the responses
+		# can be collected when the page is accepted.
+		self.variables = []
+		self.img_lists = {}
+		self.text_areas = {}
+		c = gui.Table()
+		for _type, var, question, options in self.parse_questions():
+
+			self.variables.append(var)
+
+			# The question, in a HTML document. Since every line is a
+			# question, line breaks are written as '\n'.
+			doc = questionnaire_resources.question_document(self.experiment, "\n".join(question.split("\\n")))
+			c.tr()
+			c.td(doc, align=-1)
+
+			# The response widgets, in a nested table
+			t = gui.Table()
+			t.tr()
+			if _type == "choice":
+				group = gui.Group()
+				for option in options:
+					r = gui.Radio(group, value=option)
+					r.connect(gui.CLICK, self.set_choice, (var, option))
+					t.td(r, align=-1, width=32, height=32)
+					t.td(gui.Label(option), align=-1, height=32)
+			elif _type == "rating":
+				self.img_lists[var] = []
+				for i in range(int(options[0])):
+					img = gui.Image(inactive)
+					img.connect(gui.CLICK, self.set_rating, (var, i))
+					t.td(img, align=-1, width=64, height=64)
+					self.img_lists[var].append(img)
+			else:
+				self.text_areas[var] = gui.TextArea(width=self.get("text_area_width"), height=self.get("text_area_height"))
+				t.td(self.text_areas[var], align=-1)
+			c.tr()
+			c.td(t, align=-1, height=48, valign=-1)
+
+		# The questions scroll, but the accept button is always visible
+		page = gui.Table()
+		page.tr()
+		page.td(gui.ScrollArea(c, width=self.get("width")-64, height=self.get("height")-96, hscrollbar=False), align=-1)
+		page.tr()
+		e = gui.Button(self.get("accept_text"))
+		e.connect(gui.CLICK, self.app.quit, None)
+		page.td(e, align=-1, height=48, valign=1)
+
+		# Build and pre-render the first frame, so that run() only needs to
+		# show it
+		self.app.prepare(page)
+		self.experiment.set("prepare_time_%s" % self.name, self.time() - t0)
+
+		return True
+
+	def set_choice(self, response):
+
+		"""
+		Set the response to a multiple choice question
+
+		Arguments:
+		response -- a (variable, choice) tuple
+		"""
+
+		var, choice = response
+		# Sanitize unicode. Due to a bug in usanitize() we need to convert it
+		# to a QString first.
+		self.experiment.set(var, self.experiment.usanitize(unicode(QtCore.QString(choice))))
+
+	def set_rating(self, response):
+
+		"""
+		Set the response to a rating question and change the images
+
+		Arguments:
+		response -- a (variable, rating) tuple
+		"""
+
+		var, rating = response
+		active = questionnaire_resources.load_image(self.experiment, "rating_active.png")
+		inactive = questionnaire_resources.load_image(self.experiment, "rating_inactive.png")
+
+		for i, img in enumerate(self.img_lists[var]):
+			if rating >= i:
+				surf = active
+			else:
+				surf = inactive
+			# Only repaint the icons that actually change
+			if img.value is not surf:
+				img.value = surf
+				img.repaint()
+
+		self.experiment.set(var, rating+1)
+
+	def collect_text(self):
+
+		"""Set the responses to the open questions"""
+
+		for var, text_area in self.text_areas.items():
+			value = text_area.value.strip()
+			if value == "":
+				self.experiment.set(var, None)
+			else:
+				self.experiment.set(var, self.experiment.usanitize(unicode(QtCore.QString(value))))
+
+	def run(self):
+
+		"""Run the item"""
+
+		# Show the prepared page and initialize the item
+		self.app.show()
+		self.set_item_onset()
+		self.sri = self.time()
+		for var in self.variables:
+			self.experiment.set(var, None)
+
+		# Keep running the app until all questions have been answered
+		while True:
+			self.app.run(event_driven=True)
+			self.collect_text()
+			if self.get("allow_empty") == "yes":
+				break
+			if "None" not in [self.get(var) for var in self.variables]:
+				break
+
+		self.experiment.set("response_time", self.time() - self.sri)
+
+		# Log the frame timing statistics, if they have been recorded
+		if self.app.timer:
+			self.app.timer.log(self.experiment, "frame_%s" % self.name)
+
+		# Return success
+		return True
+
+class qtquestionnaire_page(questionnaire_page, qtplugin.qtplugin):
+
+	"""The GUI aspect of the plugin"""
+
+	def __init__(self, name, experiment, string = None):
+
+		"""
+		Constructor
+
+		Arguments:
+		name -- name of the item
+		experiment -- the experiment
+
+		Keyword arguments:
+		string -- definitional string (default = None)
+		"""
+
+		# Pass the word on to the parents
+		questionnaire_page.__init__(self, name, experiment, string)
+		qtplugin.qtplugin.__init__(self, __file__)
+
+	def init_edit_widget(self):
+
+		"""Build the edit controls"""
+
+		self.lock = True
+
+		# Pass the word on to the parent
+		qtplugin.qtplugin.init_edit_widget(self, False)
+
+		# Content editor
+		self.add_line_edit_control("accept_text", "Text on accept button", tooltip = "The text that appears on the accept button")
+		self.add_combobox_control("allow_empty", "Allow empty responses", ["yes", "no"], tooltip = "Indicates whether questions may be left unanswered")
+		self.add_spinbox_control("text_area_width", "Text area width", 100, 10000, tooltip = "The width of the text areas of open questions")
+		self.add_spinbox_control("text_area_height", "Text area height", 100, 10000, tooltip = "The height of the text areas of open questions")
+		self.add_editor_control("questions", "Questions (type;variable;question;options)", tooltip = "One question per line. The type is 'choice' (the options are the choices), 'rating' (the option is the maximum rating) or 'open' (no options). Write a semicolon in a question or option as '\\;'.")
+
+		self.lock = False
+
+	def apply_edit_changes(self):
+
+		"""Apply changes to the controls"""
+
+		if not qtplugin.qtplugin.apply_edit_changes(self, False) or self.lock:
+			return
+		self.experiment.main_window.refresh(self.name)
+
+	def edit_widget(self):
+
+		"""Refresh the controls"""
+
+		self.lock = True
+		qtplugin.qtplugin.edit_widget(self)
+		self.lock = False
+		return self._edit_widget
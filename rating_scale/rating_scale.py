@@ -27,7 +27,8 @@ from PyQt4 import QtGui, QtCore
 
 path = os.path.join(os.path.dirname(os.path.split(__file__)[0]), "multiple_choice")
 sys.path.append(path)
-from pgu import gui, html
+from pgu import gui
+import questionnaire_resources
 
 class rating_scale(item.item):
 
@@ -79,6 +80,59 @@ class rating_scale(item.item):
 		# Pass the word on to the parent
 		item.item.prepare(self)
 
+		t0 = self.time()
+
+		# Create the app. On a software display, only the widgets that change
+		# are redrawn.
+		self.app = gui.Desktop(item=self, dirty_rects=questionnaire_resources.software_display())
+		self.app.connect(gui.QUIT, self.app.quit, None)
+		# Merge mouse motion, so that fast mouse movements don't pile up
+		self.app.coalesce_motion = True
+
+		# Optionally record how long every frame takes
+		if self.has("frame_timing") and self.get("frame_timing") == "yes":
+			self.app.instrument()
+
+		# Load and convert all theme images and fonts that the widgets can
+		# need, so that this doesn't happen while the item is on screen
+		self.app.theme.preload(["desktop", "document", "label", "button"])
+
+		pad = 0 # The maximum line length, used to pad the options
+
+		# Create an HTML document for the content. The rendered document is
+		# reused when the same question is shown again.
+		question = self.experiment.unsanitize(self.get("question"))
+		for l in question.split("\n"):
+			pad = max(pad, len(l))
+		doc = questionnaire_resources.question_document(self.experiment, question)
+
+		# Create a 2-column table, start with the HTML on the first row
+		c = gui.Table()
+		c.tr()
+		c.td(doc, colspan=self.get("maximum_rating")+1, align=-1)
+
+		c.tr()
+		surf = questionnaire_resources.load_image(self.experiment, "rating_inactive.png")
+		# The active image is needed on the first click, so load it now rather
+		# than while the item is running
+		questionnaire_resources.load_image(self.experiment, "rating_active.png")
+		self.img_list = []
+		for i in range(self.get("maximum_rating")):			
+			img = gui.Image(surf)
+			img.connect(gui.CLICK, self.set_response, i)
+			c.td(img, align=-1, width=64, height=64)
+			self.img_list.append(img)
+
+		c.tr()
+		e = gui.Button(self.get("accept_text"))
+		e.connect(gui.CLICK, self.app.quit, None)		
+		c.td(e, colspan=self.get("maximum_rating")+1, align=-1, height=32, valign=1)
+
+		# Build and pre-render the first frame, so that run() only needs to
+		# show it
+		self.app.prepare(c)
+		self.experiment.set("prepare_time_%s" % self.name, self.time() - t0)
+
 		#generic_response.generic_response.prepare(self)
 		return True
 
@@ -91,16 +145,20 @@ class rating_scale(item.item):
 		rating -- the current rating
 		"""
 
+		active = questionnaire_resources.load_image(self.experiment, "rating_active.png")
+		inactive = questionnaire_resources.load_image(self.experiment, "rating_inactive.png")
+
 		for i in range(self.get("maximum_rating")):
 			
 			if rating >= i:
-				res = "rating_active.png"
+				surf = active
 			else:
-				res = "rating_inactive.png"
-			surf = pygame.image.load(self.experiment.resource(res))							
+				surf = inactive
 			img = self.img_list[i]
-			img.value = surf
-			img.repaint()
+			# Only repaint the icons that actually change
+			if img.value is not surf:
+				img.value = surf
+				img.repaint()
 
 		if self.get("response_time") == "None":
 			self.experiment.set("response_time", self.time() - self.sri)
@@ -110,50 +168,23 @@ class rating_scale(item.item):
 
 		"""Run the item"""
 
-		# Initialize the item
+		# Show the prepared form and initialize the item
+		self.app.show()
 		self.set_item_onset()
 		self.sri = self.time()
 		self.experiment.set("response", None)
 		self.experiment.set("response_time", None)
 
-		# Create the app
-		self.app = gui.Desktop(item=self)
-		self.app.connect(gui.QUIT, self.app.quit, None)
-
-		pad = 0 # The maximum line length, used to pad the options
-
-		# Create an HTML document for the content
-		doc = html.HTML("")
-		for l in self.experiment.unsanitize(self.get("question")).split("\n"):
-			doc.add(gui.Label(l))
-			pad = max(pad, len(l))
-			doc.br(0)
-
-		# Create a 2-column table, start with the HTML on the first row
-		c = gui.Table()
-		c.tr()
-		c.td(doc, colspan=self.get("maximum_rating")+1, align=-1)
-
-		c.tr()
-		surf = pygame.image.load(self.experiment.resource("rating_inactive.png"))
-		self.img_list = []
-		for i in range(self.get("maximum_rating")):			
-			img = gui.Image(surf)
-			img.connect(gui.CLICK, self.set_response, i)
-			c.td(img, align=-1, width=64, height=64)
-			self.img_list.append(img)
-
-		c.tr()
-		e = gui.Button(self.get("accept_text"))
-		e.connect(gui.CLICK, self.app.quit, None)		
-		c.td(e, colspan=self.get("maximum_rating")+1, align=-1, height=32, valign=1)
-
 		# Keep running the app until a response has been received
 		while True:
-			self.app.run(c)
+			self.app.run(event_driven=True)
 			if self.get("response") != "None":
 				break
 
+		# Log the frame timing statistics, if they have been recorded
+		if self.app.timer:
+			self.app.timer.log(self.experiment, "frame_%s" % self.name)
+
 		# Return success
 		return True
 
@@ -80,6 +80,35 @@ class slider(item.item):
 		# Pass the word on to the parent
 		item.item.prepare(self)
 
+		t0 = self.time()
+
+		# Create the canvas and mouse up front, so that run() doesn't have to
+		self.canvas = canvas(self.experiment)
+		self.mouse = mouse(self.experiment, timeout=20)
+
+		# Slider dimensions
+		self.slider_w = self.slider_width
+		self.slider_h = self.slider_heigth
+		self.slider_x = self.get("width")/2-self.slider_w/2
+		self.slider_y = self.get("height")/2-self.slider_h/2
+
+		# Colours, so that they don't have to be looked up on every frame
+		self.slider_fill_colour = self.get("sf_colour")
+		self.slider_bg_colour = self.get("bg_colour")
+
+		# Pre-render the static layer, i.e. everything except the slider fill.
+		# During run() only the part of the fill that changes is drawn on top.
+		self.canvas.set_bgcolor(self.slider_bg_colour)
+		self.canvas.clear()
+		# Draw the text 
+		self.canvas.text(self.get("question"), y=self.slider_y-100, color=self.get("txt_colour"))
+		self.canvas.text(self.get("accept_text"), y=self.slider_y+self.slider_h+50, color=self.get("txt_colour"))
+		# Draw the slider frame
+		self.canvas.set_fgcolor(self.get("fg_colour"))
+		self.canvas.rect(self.slider_x-1, self.slider_y-1, self.slider_w+2, self.slider_h+2)
+
+		self.experiment.set("prepare_time_%s" % self.name, self.time() - t0)
+
 		#generic_response.generic_response.prepare(self)
 		return True
 		
@@ -87,40 +116,42 @@ class slider(item.item):
 
 		"""Run the item"""
 
-		# Initialize the item
+		my_canvas = self.canvas
+		my_mouse = self.mouse
+
+		# Slider dimensions
+		slider_w = self.slider_w
+		slider_h = self.slider_h
+		slider_x = self.slider_x
+		slider_y = self.slider_y
+
+		# The width of the fill that is currently drawn on the canvas. Since 
+		# the canvas starts out with an empty slider, this is 0.
+		drawn_fill = 0
+
+		# Show the static layer and initialize the item
+		my_canvas.show()
 		self.set_item_onset()
 		self.sri = self.time()
 		self.experiment.set("slider_percent", None)
-		my_canvas = canvas(self.experiment)
-		my_mouse = mouse(self.experiment, timeout=20)
-
 
 		# Create the app
 		while True:
 
-			# Slider dimensions
-			slider_w = self.slider_width
-			slider_h = self.slider_heigth
-			slider_x = self.get("width")/2-slider_w/2
-			slider_y = self.get("height")/2-slider_h/2
-			
 			# Determine the slider fill based on the mouse position
 			pos, time = my_mouse.get_pos()
 			x, y = pos
 			slider_fill = min(slider_w, max(0, x-slider_x))
 
-			my_canvas.set_bgcolor(self.get("bg_colour"))
-			my_canvas.clear()
-			# Draw the text 
-			my_canvas.text(self.get("question"), y=slider_y-100, color=self.get("txt_colour"))
-			my_canvas.text(self.get("accept_text"), y=slider_y+slider_h+50, color=self.get("txt_colour"))
-			# Draw the slider frame
-			my_canvas.set_fgcolor(self.get("fg_colour"))
-			my_canvas.rect(slider_x-1, slider_y-1, slider_w+2, slider_h+2)
-			# Draw the slider fill
-			my_canvas.rect(slider_x, slider_y, slider_fill, slider_h, fill=True, color=self.get("sf_colour"))
-			# Draw the canvas
-			my_canvas.show()
+			# Only redraw the part of the fill that has changed since the last
+			# frame, and only show the canvas if something has changed
+			if slider_fill != drawn_fill:
+				if slider_fill > drawn_fill:
+					my_canvas.rect(slider_x+drawn_fill, slider_y, slider_fill-drawn_fill, slider_h, fill=True, color=self.slider_fill_colour)
+				else:
+					my_canvas.rect(slider_x+slider_fill, slider_y, drawn_fill-slider_fill, slider_h, fill=True, color=self.slider_bg_colour)
+				drawn_fill = slider_fill
+				my_canvas.show()
 
 			# Poll the mouse for buttonclicks
 			button, position, timestamp = my_mouse.get_click(timeout = 20)
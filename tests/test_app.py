@@ -0,0 +1,128 @@
+"""
+This file is part of opensesame.
+
+opensesame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+opensesame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with opensesame.  If not, see <http://www.gnu.org/licenses/>.
+
+Tests for the coalescing of mouse motion events. Run with:
+
+	python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import pygame
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, "multiple_choice"))
+from pgu import gui
+
+def motion(pos, rel=(0, 0), buttons=(0, 0, 0)):
+
+	return pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=rel,
+		buttons=buttons)
+
+def key(k):
+
+	return pygame.event.Event(pygame.KEYDOWN, key=k, mod=0, unicode="")
+
+class test_coalesce(unittest.TestCase):
+
+	"""App.coalesce() and App._same_hover()"""
+
+	def setUp(self):
+
+		pygame.init()
+		pygame.display.set_mode((200, 200))
+		self.app = gui.App()
+		self.app.coalesce_motion = True
+		self.container = gui.Container(width=200, height=200)
+		self.a = gui.Widget(width=50, height=50)
+		self.b = gui.Widget(width=50, height=50)
+		self.container.add(self.a, 0, 0)
+		self.container.add(self.b, 100, 0)
+		self.app.init(self.container)
+		# The events that reach the widget tree
+		self.routed = []
+		event = self.app.event
+		def routed(e):
+			self.routed.append(e)
+			return event(e)
+		self.app.event = routed
+
+	def tearDown(self):
+
+		pygame.quit()
+
+	def test_merge(self):
+
+		"""Runs of motion events are merged, other events are kept in
+		order"""
+
+		events = self.app.coalesce([motion((1, 1), (1, 1)),
+			motion((3, 2), (2, 1)), key(pygame.K_a), motion((4, 4), (1, 2)),
+			motion((5, 4), (1, 0)), motion((9, 9), (4, 5), (1, 0, 0))])
+		self.assertEqual([e.type for e in events], [pygame.MOUSEMOTION,
+			pygame.KEYDOWN, pygame.MOUSEMOTION])
+		self.assertEqual((events[0].pos, events[0].rel), ((3, 2), (3, 2)))
+		self.assertEqual(events[1].key, pygame.K_a)
+		self.assertEqual((events[2].pos, events[2].rel, events[2].buttons),
+			((9, 9), (6, 7), (1, 0, 0)))
+		# A single motion event is kept as it is
+		e = motion((1, 1))
+		self.assertTrue(self.app.coalesce([e])[0] is e)
+
+	def test_same_hover(self):
+
+		"""Motion within the hovered widget is not routed"""
+
+		self.app.dispatch([motion((10, 10))])
+		self.assertTrue(self.container.myhover is self.a)
+		self.assertEqual(len(self.routed), 1)
+		self.assertTrue(self.app._same_hover(motion((20, 20))))
+		self.app.dispatch([motion((20, 20))])
+		self.assertEqual(len(self.routed), 1)
+		# Leaving the widget, entering another one and dragging are routed
+		self.assertFalse(self.app._same_hover(motion((70, 10))))
+		self.assertFalse(self.app._same_hover(motion((110, 10))))
+		self.assertFalse(self.app._same_hover(motion((20, 20),
+			buttons=(1, 0, 0))))
+		self.app.dispatch([motion((110, 10))])
+		self.assertEqual(len(self.routed), 2)
+		self.assertTrue(self.container.myhover is self.b)
+
+	def test_listener(self):
+
+		"""Motion within a widget that listens to motion is routed"""
+
+		moved = []
+		self.a.connect(gui.MOUSEMOTION, moved.append, None)
+		self.app.dispatch([motion((10, 10)), key(pygame.K_a),
+			motion((20, 20))])
+		self.assertFalse(self.app._same_hover(motion((30, 30))))
+		self.assertEqual(len(moved), 2)
+
+	def test_no_hover(self):
+
+		"""Without a hovered widget, motion may enter one, so it is
+		routed"""
+
+		self.assertFalse(self.app._same_hover(motion((10, 10))))
+
+if __name__ == "__main__":
+	unittest.main()
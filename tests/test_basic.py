@@ -0,0 +1,111 @@
+"""
+This file is part of opensesame.
+
+opensesame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+opensesame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with opensesame.  If not, see <http://www.gnu.org/licenses/>.
+
+Tests for the basic widgets. Run with:
+
+	python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import pygame
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, "multiple_choice"))
+from pgu import gui
+
+class test_label(unittest.TestCase):
+
+	"""The rendered text of a Label, which is cached by color"""
+
+	def setUp(self):
+
+		pygame.init()
+		pygame.display.set_mode((200, 100))
+		# A theme of its own, because the fonts of the shared theme don't
+		# survive pygame.quit()
+		self.app = gui.App(theme=gui.Theme())
+		self.label = gui.Label("Label")
+		self.app.init(self.label)
+
+	def tearDown(self):
+
+		pygame.quit()
+
+	def paint(self, color):
+
+		"""Paints the label in a color, and returns the painted surface"""
+
+		self.label.style.color = color
+		s = pygame.Surface(self.label.rect.size)
+		s.fill((255, 255, 255))
+		self.label.paint(s)
+		return s
+
+	def colors(self, s):
+
+		"""Returns the colors of the text in a painted surface"""
+
+		colors = set()
+		for x in range(s.get_width()):
+			for y in range(s.get_height()):
+				colors.add(tuple(s.get_at((x, y)))[:3])
+		colors.discard((255, 255, 255))
+		return colors
+
+	def test_colors(self):
+
+		"""Every color is rendered once, and the text has that color"""
+
+		self.paint((255, 0, 0))
+		red = self.label._rendered[255, 0, 0]
+		self.assertTrue((255, 0, 0) in self.colors(self.paint((255, 0, 0))))
+		self.assertTrue(self.label._rendered[255, 0, 0] is red)
+		blue = self.colors(self.paint((0, 0, 255)))
+		self.assertTrue((0, 0, 255) in blue)
+		self.assertFalse((255, 0, 0) in blue)
+		self.assertEqual(len(self.label._rendered), 2)
+		# Going back to a color reuses its rendered text
+		self.assertTrue((255, 0, 0) in self.colors(self.paint((255, 0, 0))))
+		self.assertTrue(self.label._rendered[255, 0, 0] is red)
+
+	def test_text(self):
+
+		"""Changing the text or the font renders the text again"""
+
+		self.paint((0, 0, 0))
+		old = self.label._rendered[0, 0, 0]
+		self.label.set_text("Other")
+		self.paint((0, 0, 0))
+		self.assertFalse(self.label._rendered[0, 0, 0] is old)
+		old = self.label._rendered[0, 0, 0]
+		# Also when the value is changed directly
+		self.label.value = "Again"
+		self.paint((0, 0, 0))
+		self.assertFalse(self.label._rendered[0, 0, 0] is old)
+		old = self.label._rendered[0, 0, 0]
+		self.label.set_font(pygame.font.Font(None, 20))
+		self.paint((0, 0, 0))
+		self.assertFalse(self.label._rendered[0, 0, 0] is old)
+		self.assertEqual(len(self.label._rendered), 1)
+
+if __name__ == "__main__":
+	unittest.main()
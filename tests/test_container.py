@@ -0,0 +1,124 @@
+"""
+This file is part of opensesame.
+
+opensesame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+opensesame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with opensesame.  If not, see <http://www.gnu.org/licenses/>.
+
+Tests for the spatial index of containers. Run with:
+
+	python -m unittest discover tests
+"""
+
+import os
+import sys
+import random
+import unittest
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import pygame
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, "multiple_choice"))
+from pgu import gui
+
+def motion(pos):
+
+	return pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0),
+		buttons=(0, 0, 0))
+
+class round_widget(gui.Widget):
+
+	"""A widget with its own collision testing"""
+
+	def collidepoint(self, pos):
+
+		return False
+
+class test_index(unittest.TestCase):
+
+	"""Container._hits() and its invalidation"""
+
+	def setUp(self):
+
+		pygame.init()
+		pygame.display.set_mode((400, 400))
+		self.app = gui.App()
+		self.container = gui.Container(width=400, height=400)
+
+	def tearDown(self):
+
+		pygame.quit()
+
+	def test_hits(self):
+
+		"""The index returns every widget that contains a position, in the
+		order of the widgets"""
+
+		rnd = random.Random(0)
+		for i in range(100):
+			self.container.add(gui.Widget(width=rnd.randint(1, 100),
+				height=rnd.randint(1, 100)), rnd.randint(0, 300),
+				rnd.randint(0, 300))
+		self.container.add(round_widget(width=10, height=10), 0, 0)
+		self.app.init(self.container)
+		for i in range(500):
+			pos = rnd.randint(0, 399), rnd.randint(0, 399)
+			hits = [w for w in self.container._hits(pos)
+				if w.collidepoint(pos)]
+			expected = [w for w in self.container.widgets
+				if w.collidepoint(pos)]
+			self.assertEqual(hits, expected)
+		# Widgets with their own collision testing are always tested
+		self.assertTrue(self.container.widgets[-1] in
+			self.container._hits((399, 399)))
+
+	def test_resize(self):
+
+		"""After App.resize(), the index has the new positions"""
+
+		a = gui.Widget(width=50, height=50)
+		b = gui.Widget(width=50, height=50)
+		self.container.add(a, 0, 0)
+		self.container.add(b, 100, 0)
+		self.app.init(self.container)
+		self.container.event(motion((10, 10)))
+		self.assertTrue(self.container.myhover is a)
+		# Swap the widgets
+		a.style.x, b.style.x = 100, 0
+		a.chsize()
+		generation = gui.Container.generation
+		self.app.resize()
+		self.assertNotEqual(gui.Container.generation, generation)
+		self.assertEqual(self.container._hits((10, 10)), [b])
+		self.container.event(motion((12, 10)))
+		self.assertTrue(self.container.myhover is b)
+
+	def test_add_remove(self):
+
+		"""Adding and removing widgets invalidates the index"""
+
+		a = gui.Widget(width=50, height=50)
+		self.container.add(a, 0, 0)
+		self.app.init(self.container)
+		self.assertEqual(self.container._hits((10, 10)), [a])
+		self.container.remove(a)
+		self.assertEqual(self.container._hits((10, 10)), [])
+		b = gui.Widget(width=50, height=50)
+		b.rect = pygame.Rect(0, 0, 50, 50)
+		self.container.add(b, 0, 0)
+		self.assertEqual(self.container._hits((10, 10)), [b])
+
+if __name__ == "__main__":
+	unittest.main()
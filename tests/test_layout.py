@@ -0,0 +1,163 @@
+"""
+This file is part of opensesame.
+
+opensesame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+opensesame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with opensesame.  If not, see <http://www.gnu.org/licenses/>.
+
+Tests for the document layout engine. Run with:
+
+	python -m unittest discover tests
+"""
+
+import os
+import sys
+import random
+import unittest
+
+import pygame
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, "multiple_choice"))
+from pgu.gui import layout
+
+class item(object):
+
+	"""A word or an inline widget"""
+
+	def __init__(self, w, h):
+
+		self.rect = pygame.Rect(0, 0, w, h)
+
+class aligned(item):
+
+	"""A widget that floats to the left or right, or is centered"""
+
+	def __init__(self, w, h, align):
+
+		item.__init__(self, w, h)
+		self.align = align
+
+class run(object):
+
+	"""A text run"""
+
+	def __init__(self, widths, heights, space, height):
+
+		self.widths = widths
+		self.heights = heights
+		self.space = space
+		self.height = height
+
+def element(rnd):
+
+	"""Returns a random document element"""
+
+	kind = rnd.randrange(10)
+	if kind < 4:
+		return item(rnd.randint(1, 80), rnd.randint(8, 24))
+	if kind < 6:
+		return (rnd.randint(2, 8), rnd.randint(8, 24))
+	if kind == 6:
+		return (0, rnd.randint(8, 24))
+	if kind == 7:
+		return rnd.choice((-1, 0, 1))
+	if kind == 8:
+		return aligned(rnd.randint(10, 120), rnd.randint(10, 60),
+			rnd.choice((-1, 0, 1)))
+	n = rnd.randint(1, 20)
+	return run([rnd.randint(1, 80) for i in range(n)],
+		[rnd.randint(12, 20) for i in range(n)], rnd.randint(2, 6), 16)
+
+def snapshot(l):
+
+	"""Returns the positions of all laid out elements and fragments, and the
+	height of the layout"""
+
+	placed = []
+	for e in l.widgets:
+		if isinstance(e, layout.Fragment):
+			placed.append((id(e.run), e.i, e.j, tuple(e.rect)))
+		else:
+			placed.append((id(e), tuple(e.rect)))
+	return placed, l.rect.h
+
+class test_reflow(unittest.TestCase):
+
+	"""Layout.resize() reflows from the first changed element, which must
+	give the same result as laying out the document from scratch"""
+
+	def fresh(self, elements, width):
+
+		l = layout.Layout(pygame.Rect(0, 0, width, 0))
+		for e in elements:
+			l.add(e)
+		l.resize()
+		return snapshot(l)
+
+	def test_random_changes(self):
+
+		"""Random elements are added, removed and resized"""
+
+		for seed in range(20):
+			rnd = random.Random(seed)
+			width = rnd.randint(100, 600)
+			l = layout.Layout(pygame.Rect(0, 0, width, 0))
+			for i in range(rnd.randint(0, 100)):
+				l.add(element(rnd))
+			l.resize()
+			for step in range(30):
+				change = rnd.randrange(4)
+				if change == 0:
+					for i in range(rnd.randint(1, 5)):
+						l.add(element(rnd))
+				elif change == 1 and l._widgets:
+					l.remove(rnd.choice(l._widgets))
+				elif change == 2 and l._widgets:
+					l.pop()
+				else:
+					resizable = [e for e in l._widgets if hasattr(e, "rect")]
+					if resizable:
+						e = rnd.choice(resizable)
+						e.rect.size = rnd.randint(1, 120), rnd.randint(8, 60)
+				l.resize()
+				self.assertEqual(snapshot(l), self.fresh(l._widgets, width),
+					"seed %d, step %d" % (seed, step))
+
+	def test_unchanged(self):
+
+		"""Without changes, resize() keeps the layout"""
+
+		rnd = random.Random(0)
+		l = layout.Layout(pygame.Rect(0, 0, 300, 0))
+		for i in range(50):
+			l.add(element(rnd))
+		l.resize()
+		before = snapshot(l)
+		l.resize()
+		self.assertEqual(snapshot(l), before)
+
+	def test_new_width(self):
+
+		"""A different width lays out the whole document again"""
+
+		rnd = random.Random(1)
+		l = layout.Layout(pygame.Rect(0, 0, 300, 0))
+		for i in range(50):
+			l.add(element(rnd))
+		l.resize()
+		l.rect.w = 200
+		l.resize()
+		self.assertEqual(snapshot(l), self.fresh(l._widgets, 200))
+
+if __name__ == "__main__":
+	unittest.main()
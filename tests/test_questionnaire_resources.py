@@ -0,0 +1,107 @@
+"""
+This file is part of opensesame.
+
+opensesame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+opensesame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with opensesame.  If not, see <http://www.gnu.org/licenses/>.
+
+Tests for the resources that are shared by the questionnaire plug-ins. Run
+with:
+
+	python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import pygame
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, "multiple_choice"))
+from pgu import gui
+import questionnaire_resources
+
+class test_question_document(unittest.TestCase):
+
+	"""The rendered questions that question_document() reuses"""
+
+	def setUp(self):
+
+		pygame.init()
+		pygame.display.set_mode((200, 100))
+		# A theme of its own, because the fonts of the shared theme don't
+		# survive pygame.quit()
+		self.app = gui.App(theme=gui.Theme())
+		# Only the identity of the experiment matters
+		self.experiment = object()
+		self.max_documents = questionnaire_resources.max_documents
+		questionnaire_resources.max_documents = 3
+
+	def tearDown(self):
+
+		questionnaire_resources.max_documents = self.max_documents
+		# Don't keep surfaces of this display
+		questionnaire_resources.question_document(object(), "")
+		pygame.quit()
+
+	def document(self, text, width=None):
+
+		"""Returns the rendered question, and whether it was reused"""
+
+		hits = questionnaire_resources.document_hits
+		doc = questionnaire_resources.question_document(self.experiment,
+			text, width)
+		return doc.value, questionnaire_resources.document_hits > hits
+
+	def test_reuse(self):
+
+		"""The same question is rendered once"""
+
+		surf, hit = self.document("Question\nSecond line")
+		self.assertFalse(hit)
+		self.assertEqual(self.document("Question\nSecond line"), (surf, True))
+		# Another width or another question is rendered separately
+		self.assertFalse(self.document("Question\nSecond line", 300)[1])
+		self.assertFalse(self.document("Question")[1])
+
+	def test_eviction(self):
+
+		"""The least recently used question is discarded first"""
+
+		first = self.document("q0")[0]
+		self.document("q1")
+		self.document("q2")
+		# q0 is used again, so q1 is now the least recently used
+		self.assertTrue(self.document("q0")[1])
+		self.document("q3")
+		self.assertEqual(questionnaire_resources.document_cache_info()[2], 3)
+		self.assertEqual(self.document("q0"), (first, True))
+		self.assertTrue(self.document("q3")[1])
+		self.assertFalse(self.document("q1")[1])
+		# Adding q1 again has discarded q2
+		self.assertFalse(self.document("q2")[1])
+
+	def test_experiment(self):
+
+		"""Another experiment starts without rendered questions"""
+
+		self.document("q0")
+		self.experiment = object()
+		self.assertFalse(self.document("q0")[1])
+		self.assertEqual(questionnaire_resources.document_cache_info()[2], 1)
+
+if __name__ == "__main__":
+	unittest.main()
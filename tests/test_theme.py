@@ -0,0 +1,78 @@
+"""
+This file is part of opensesame.
+
+opensesame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+opensesame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with opensesame.  If not, see <http://www.gnu.org/licenses/>.
+
+Tests for the GUI theme. Run with:
+
+	python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+import warnings
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import pygame
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, "multiple_choice"))
+from pgu import gui
+
+class test_preload(unittest.TestCase):
+
+	"""Theme.preload() on the default theme"""
+
+	def setUp(self):
+
+		pygame.init()
+		pygame.display.set_mode((64, 64))
+
+	def tearDown(self):
+
+		pygame.quit()
+
+	def test_all_classes(self):
+
+		"""Without arguments, every class is preloaded. The image that the
+		default theme refers to, but doesn't have, is skipped with a
+		warning."""
+
+		theme = gui.Theme()
+		with warnings.catch_warnings(record=True) as caught:
+			warnings.simplefilter("always")
+			theme.preload()
+		self.assertTrue(any("select.arrow.tga" in str(w.message)
+			for w in caught))
+		for key in (("button", "", "background"), ("button", "hover",
+			"background"), ("radio", "", "off"), ("vscrollbar", "", "minus")):
+			self.assertTrue(key in theme.lookups)
+		# The images have been converted to the display format
+		self.assertTrue(("button", "", "background") in theme._converted)
+
+	def test_some_classes(self):
+
+		"""With a list of classes, only those classes (and their sub-classes)
+		are preloaded."""
+
+		theme = gui.Theme()
+		theme.preload(["button"])
+		self.assertTrue(("button", "", "background") in theme.cache)
+		self.assertFalse(("radio", "", "off") in theme.cache)
+
+if __name__ == "__main__":
+	unittest.main()
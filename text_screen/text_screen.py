@@ -26,7 +26,8 @@ from PyQt4 import QtGui, QtCore
 
 path = os.path.join(os.path.dirname(os.path.split(__file__)[0]), "multiple_choice")
 sys.path.append(path)
-from pgu import gui, html
+from pgu import gui
+import questionnaire_resources
 
 class text_screen(item.item):
 
@@ -73,28 +74,31 @@ class text_screen(item.item):
 		# Pass the word on to the parent
 		item.item.prepare(self)
 
-		#generic_response.generic_response.prepare(self)
-		return True
+		t0 = self.time()
 
-	def run(self):
-
-		"""Run the item"""
+		# Create the app. On a software display, only the widgets that change
+		# are redrawn.
+		self.app = gui.Desktop(item=self, dirty_rects=questionnaire_resources.software_display())
+		self.app.connect(gui.QUIT, self.app.quit, None)
+		# Merge mouse motion, so that fast mouse movements don't pile up
+		self.app.coalesce_motion = True
 
-		# Initialize the item
-		self.set_item_onset()
+		# Optionally record how long every frame takes
+		if self.has("frame_timing") and self.get("frame_timing") == "yes":
+			self.app.instrument()
 
-		# Create the app
-		self.app = gui.Desktop(item=self)
-		self.app.connect(gui.QUIT, self.app.quit, None)
+		# Load and convert all theme images and fonts that the widgets can
+		# need, so that this doesn't happen while the item is on screen
+		self.app.theme.preload(["desktop", "document", "label", "button"])
 
 		pad = 0 # The maximum line length, used to pad the options
 
-		# Create an HTML document for the content
-		doc = html.HTML("")
-		for l in self.experiment.unsanitize(self.get("question")).split("\n"):
-			doc.add(gui.Label(l))
+		# Create an HTML document for the content. The rendered document is
+		# reused when the same question is shown again.
+		question = self.experiment.unsanitize(self.get("question"))
+		for l in question.split("\n"):
 			pad = max(pad, len(l))
-			doc.br(0)
+		doc = questionnaire_resources.question_document(self.experiment, question)
 
 		# Create a 2-column table, start with the HTML on the first row
 		c = gui.Table()
@@ -106,8 +110,28 @@ class text_screen(item.item):
 		e.connect(gui.CLICK, self.app.quit, None)		
 		c.td(e, align=-1, height=32, valign=1)
 
-		self.app.run(c)
+		# Build and pre-render the first frame, so that run() only needs to
+		# show it
+		self.app.prepare(c)
+		self.experiment.set("prepare_time_%s" % self.name, self.time() - t0)
+
+		#generic_response.generic_response.prepare(self)
+		return True
+
+	def run(self):
+
+		"""Run the item"""
+
+		# Show the prepared form and initialize the item
+		self.app.show()
+		self.set_item_onset()
+
+		self.app.run(event_driven=True)
 		
+		# Log the frame timing statistics, if they have been recorded
+		if self.app.timer:
+			self.app.timer.log(self.experiment, "frame_%s" % self.name)
+
 		# Return success
 		return True
 